@@ -2,27 +2,32 @@
 # Group 9
 # Maxwell Hadaway, Kenechukwu Aniedobe, Michael Olatunji
 # LAST UPDATED: 12/4/2025
-import tkinter as tk
+import json
 import random
 import math
+import sys
 import time
-import matplotlib.pyplot as plt   # for histograms
+
+try:
+    import numpy as np   # only needed for the raster renderer
+except ImportError:
+    np = None
+
+# the physics is the shared headless core; tkinter and matplotlib are
+# only imported once the window / the histograms are actually needed
+from browniancas9Core import (
+    WIDTH, HEIGHT, DNA_RADIUS, CAS9_RADIUS, UPDATE_INTERVAL_MS, CAS9_SPEED,
+    PHASES, PhaseProfiler, SimObserver, Simulation,
+)
 
 # --------------------
 # CONFIG
 # --------------------
-WIDTH, HEIGHT = 1000, 1000
-
 # Default starting values (used as slider defaults)
 NUM_JUNK_DNA = 100
 NUM_VIRUS_DNA = 15
 NUM_CAS9 = 15
 
-TIME_SCALE = 0.2
-
-DNA_RADIUS = 10
-CAS9_RADIUS = 20
-
 BG_COLOR = "black"
 
 COLOR_DNA_JUNK = "gray70"
@@ -31,303 +36,195 @@ COLOR_CAS9_FREE = "lime green"
 COLOR_CAS9_BOUND_JUNK = "yellow"
 COLOR_CAS9_BOUND_VIRUS = "red3"   # big red ball: Cas9 stuck to virus (failed)
 
-DIRECTIONS = [
-    (0, -1), (0, 1), (-1, 0), (1, 0),
-    (-1, -1), (1, -1), (-1, 1), (1, 1)
-]
-
-UPDATE_INTERVAL_MS = 20
+# rendering is independent of the physics: the screen is redrawn at most
+# RENDER_FPS times per second, and each frame runs however many fixed
+# UPDATE_INTERVAL_MS ticks are due (wall time x sim speed), at most MAX_TICKS_PER_FRAME
+# and never more than one frame interval of wall time
+RENDER_FPS = 30
+MAX_TICKS_PER_FRAME = 250
 
-BIND_TIME_JUNK = 1.0            # fallback, junk uses its own sampled time
-BIND_TIME_VIRUS = 2.0           # fallback, virus uses its own sampled time
+# "canvas": one Tk oval per particle (fine up to a few hundred)
+# "raster": all particles drawn into one NumPy image per frame (needs numpy),
+#           for the populations the batch sweeps use
+RENDERER = "canvas"
 
-COOLDOWN_JUNK = 2.5
-COOLDOWN_VIRUS_FAIL = 2.5       # virus ignore time after failed check
+# slider caps (junk, virus, Cas9) for each renderer
+SLIDER_MAX = {
+    "canvas": (300, 100, 100),
+    "raster": (20000, 5000, 5000),
+}
 
 EXPERIMENT_DURATION = 20.0
 BIN_WIDTH = 5.0
 
-COLLISION_BUFFER = 0.0
+# start with the profiler on: per-phase ms/tick and hot-path counters in
+# the right panel, plus a JSON summary on stdout when the experiment ends
+PROFILE = False
 
-# success probability: P(immediate cut when Cas9 hits a virus)
-SUCCESS_PROB = 0.8
-
-# Scale virus dwell times so they don't exceed ~12 s
-VIRUS_TIME_SCALE = 0.27   # 0.27 * 43.7 ≈ 11.8 s max for strongest bind
+# seed for each experiment's random.Random; None = new random run every time,
+# an int replays the same experiment on every Start
+SEED = None
 
 # --------------------
-# JUNK DNA MISMATCH DISTRIBUTION
+# RENDERERS (observers of the core Simulation)
 # --------------------
-JUNK_DISTANCES = list(range(1, 11))   # 1..10
-
-_raw_p = [0.75 * (0.25 ** (n - 1)) for n in JUNK_DISTANCES]
-_raw_sum = sum(_raw_p)
-JUNK_PROBS = [v / _raw_sum for v in _raw_p]
+def draw_xy(p):
+    """Where to draw a particle: a bound Cas9 sits on its DNA."""
+    bound = getattr(p, "bound_to", None)
+    if bound is not None:
+        return bound.x, bound.y
+    return p.x, p.y
 
 
-def sample_junk_bind_time():
-    """
-    Sample a mismatch 'distance' n from {1..10} with P(n),
-    then compute t_bound = 0.0026 * exp(0.9729 * n).
-    (Your first MATLAB model for junk DNA.)
-    """
-    n = random.choices(JUNK_DISTANCES, weights=JUNK_PROBS, k=1)[0]
-    t_bound = 0.0026 * math.exp(0.9729 * n)
-    return t_bound
+def cas9_color(c):
+    if c.state == "bound_junk":
+        return COLOR_CAS9_BOUND_JUNK
+    if c.state == "bound_virus":
+        return COLOR_CAS9_BOUND_VIRUS   # big red ball: failed virus check
+    return COLOR_CAS9_FREE
 
 
-# --------------------
-# VIRUS MISMATCH / BIND-TIME MODEL (from your MATLAB code)
-# --------------------
-def generate_virus_dwell_times(n):
+class CanvasRenderer(SimObserver):
     """
-    MATLAB logic:
-
-      x = 1:10;
-      p = 0.75 * 0.25^(x-1); p = p / sum(p);
-      distance = randsample(x, ..., p);
-      distance' = -distance + 11;
-      t_bound = 0.0026 * exp(0.9729 * distance');
-
-    Then scaled by VIRUS_TIME_SCALE so max is ~12 s.
+    One Tk oval per particle. draw() only touches the ovals that moved
+    or changed colour since the last frame; kills are deleted as they
+    happen through on_capture.
     """
-    x_vals = list(range(1, 11))
-
-    p = [0.75 * (0.25 ** (xi - 1)) for xi in x_vals]
-    s = sum(p)
-    p = [pi / s for pi in p]
-
-    dwell_times = []
-
-    for _ in range(n):
-        distance = random.choices(x_vals, weights=p, k=1)[0]
-        distance_prime = -distance + 11
-        t_bound = 0.0026 * math.exp(0.9729 * distance_prime)
-        t_bound *= VIRUS_TIME_SCALE
-        dwell_times.append(t_bound)
-
-    return dwell_times
 
-
-# --------------------
-# CLASSES
-# --------------------
-class DNA:
-    def __init__(self, canvas, x, y, radius, kind):
+    def __init__(self, canvas):
         self.canvas = canvas
-        self.x = x
-        self.y = y
-        self.r = radius
-        self.kind = kind        # 'junk' or 'virus'
-        self.alive = True
-        self.dir = random.choice(DIRECTIONS)
-        self.cooldown_until = 0.0
-        self.bound = False      # prevents multi-Cas9 binding
-
-        if self.kind == "junk":
-            self.junk_bind_time = sample_junk_bind_time()
-        else:
-            self.junk_bind_time = None
-
-        # virus-specific bind time (set later in create_dna)
-        self.virus_bind_time = None
+        self.items = {}      # particle -> [item id, drawn (x, y), drawn colour]
 
-        color = COLOR_DNA_JUNK if kind == "junk" else COLOR_DNA_VIRUS
-        self.id = canvas.create_oval(
-            self.x - self.r, self.y - self.r,
-            self.x + self.r, self.y + self.r,
+    def add(self, p, color):
+        x, y = draw_xy(p)
+        item = self.canvas.create_oval(
+            x - p.r, y - p.r, x + p.r, y + p.r,
             fill=color, outline=color
         )
+        self.items[p] = [item, (x, y), color]
+
+    def attach(self, sim):
+        for d in sim.dna_list:
+            self.add(d, COLOR_DNA_JUNK if d.kind == "junk" else COLOR_DNA_VIRUS)
+        for c in sim.cas9_list:
+            self.add(c, cas9_color(c))
+
+    def clear(self):
+        for item, _, _ in self.items.values():
+            self.canvas.delete(item)
+        self.items = {}
+
+    def on_capture(self, sim, cas9, dna):
+        for p in (cas9, dna):
+            self.canvas.delete(self.items.pop(p)[0])
+
+    def redraw(self, p, color):
+        entry = self.items[p]
+        x, y = draw_xy(p)
+        if (x, y) != entry[1]:
+            self.canvas.coords(entry[0], x - p.r, y - p.r, x + p.r, y + p.r)
+            entry[1] = (x, y)
+        if color != entry[2]:
+            self.canvas.itemconfig(entry[0], fill=color, outline=color)
+            entry[2] = color
+
+    def draw(self, sim):
+        for d in sim.dna_list:
+            self.redraw(d, self.items[d][2])
+        for c in sim.cas9_list:
+            self.redraw(c, cas9_color(c))
+
+
+class RasterRenderer(SimObserver):
+    """
+    Draws every particle into one RGB NumPy buffer and pushes it to a
+    single PhotoImage per frame, so the cost is one image upload instead
+    of one Tk item update per particle.
+    """
 
-    def move_step(self, speed):
-        if not self.alive:
-            return
-
-        dx, dy = self.dir
-        new_x = self.x + dx * speed * 0.3
-        new_y = self.y + dy * speed * 0.3
-
-        # walls
-        if new_x - self.r < 0:
-            new_x = self.r
-            dx = -dx
-        elif new_x + self.r > WIDTH:
-            new_x = WIDTH - self.r
-            dx = -dx
-
-        if new_y - self.r < 0:
-            new_y = self.r
-            dy = -dy
-        elif new_y + self.r > HEIGHT:
-            new_y = HEIGHT - self.r
-            dy = -dy
-
-        self.x = new_x
-        self.y = new_y
-        self.dir = (dx, dy)
-
-        if random.random() < 0.1:
-            self.dir = random.choice(DIRECTIONS)
-
-        self.canvas.coords(
-            self.id,
-            self.x - self.r, self.y - self.r,
-            self.x + self.r, self.y + self.r
-        )
-
-
-class Cas9:
-    def __init__(self, canvas, x, y, radius):
+    def __init__(self, root, canvas):
+        import tkinter as tk
+        self.root = root
         self.canvas = canvas
-        self.x = x
-        self.y = y
-        self.r = radius
-
-        self.dir = random.choice(DIRECTIONS)
-        self.state = "free"       # 'free', 'bound_junk', 'bound_virus'
-        self.bound_to = None
-        self.bound_until = 0.0
-        self.alive = True
-
-        self.id = canvas.create_oval(
-            self.x - self.r, self.y - self.r,
-            self.x + self.r, self.y + self.r,
-            fill=COLOR_CAS9_FREE, outline=COLOR_CAS9_FREE
-        )
-
-    def set_color(self):
-        if self.state == "free":
-            color = COLOR_CAS9_FREE
-        elif self.state == "bound_junk":
-            color = COLOR_CAS9_BOUND_JUNK
-        elif self.state == "bound_virus":
-            color = COLOR_CAS9_BOUND_VIRUS   # big red ball: failed virus check
-        else:
-            color = COLOR_CAS9_FREE
-        self.canvas.itemconfig(self.id, fill=color, outline=color)
-
-    def bind_to(self, dna, now, bind_time, state_name):
-        self.state = state_name
-        self.bound_to = dna
-        self.bound_until = now + bind_time
-        self.x, self.y = dna.x, dna.y
-        self.update_canvas_pos()
-        self.set_color()
-
-    def update_canvas_pos(self):
-        self.canvas.coords(
-            self.id,
-            self.x - self.r, self.y - self.r,
-            self.x + self.r, self.y + self.r
-        )
-
-    def move_step(self, speed, now):
-        if not self.alive:
+        self.buf = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+        self.header = f"P6 {WIDTH} {HEIGHT} 255 ".encode()
+        self.image = tk.PhotoImage(width=WIDTH, height=HEIGHT)
+        self.item = canvas.create_image(0, 0, image=self.image, anchor="nw")
+        canvas.tag_lower(self.item)          # timer text stays on top
+        self.stamps = {}
+        self.rgb_cache = {}
+
+    def attach(self, sim):
+        self.show(True)
+
+    def clear(self):
+        self.show(False)
+
+    def rgb(self, color):
+        if color not in self.rgb_cache:
+            self.rgb_cache[color] = [v >> 8 for v in self.root.winfo_rgb(color)]
+        return self.rgb_cache[color]
+
+    def stamp(self, r):
+        """Pixel offsets (dy, dx) of a filled disc of radius r."""
+        if r not in self.stamps:
+            ri = int(math.ceil(r))
+            dy, dx = np.mgrid[-ri:ri + 1, -ri:ri + 1]
+            inside = dx * dx + dy * dy <= r * r
+            self.stamps[r] = (dy[inside], dx[inside])
+        return self.stamps[r]
+
+    def show(self, visible):
+        self.canvas.itemconfig(self.item, state="normal" if visible else "hidden")
+
+    def draw_discs(self, xs, ys, r, color):
+        if not len(xs):
             return
+        dy, dx = self.stamp(r)
+        py = np.rint(ys).astype(np.intp)[:, None] + dy
+        px = np.rint(xs).astype(np.intp)[:, None] + dx
+        inside = (py >= 0) & (py < HEIGHT) & (px >= 0) & (px < WIDTH)
+        self.buf[py[inside], px[inside]] = self.rgb(color)
+
+    def draw(self, sim):
+        self.buf[:] = self.rgb(BG_COLOR)
+        dna_list, cas9_list = sim.dna_list, sim.cas9_list
+
+        # same stacking as the canvas renderer: DNA first, Cas9 on top
+        layers = (
+            ([d for d in dna_list if d.kind == "junk"], DNA_RADIUS, COLOR_DNA_JUNK),
+            ([d for d in dna_list if d.kind == "virus"], DNA_RADIUS, COLOR_DNA_VIRUS),
+            ([c for c in cas9_list if c.state == "free"], CAS9_RADIUS, COLOR_CAS9_FREE),
+            ([c for c in cas9_list if c.state == "bound_junk"], CAS9_RADIUS, COLOR_CAS9_BOUND_JUNK),
+            ([c for c in cas9_list if c.state == "bound_virus"], CAS9_RADIUS, COLOR_CAS9_BOUND_VIRUS),
+        )
+        for particles, r, color in layers:
+            xy = np.array([draw_xy(p) for p in particles], dtype=float).reshape(-1, 2)
+            self.draw_discs(xy[:, 0], xy[:, 1], r, color)
 
-        # --------------
-        # BOUND STATES
-        # --------------
-        if self.state in ("bound_junk", "bound_virus"):
-            if self.bound_to and self.bound_to.alive:
-                self.x, self.y = self.bound_to.x, self.bound_to.y
-                self.update_canvas_pos()
-
-            if now >= self.bound_until:
-                # junk: detach and put junk on cooldown
-                if self.state == "bound_junk":
-                    if self.bound_to and self.bound_to.alive:
-                        self.bound_to.cooldown_until = now + COOLDOWN_JUNK
-                    self.state = "free"
-                    self.bound_to = None
-                    self.set_color()
-
-                # virus: this state now means FAILED recognition dwell
-                elif self.state == "bound_virus":
-                    if self.bound_to and self.bound_to.alive:
-                        self.bound_to.bound = False
-                        # virus cooldown was set at collision time
-                    self.state = "free"
-                    self.bound_to = None
-                    self.set_color()
-
-            return
-
-        # --------------
-        # FREE STATE (Brownian)
-        # --------------
-        dx, dy = self.dir
-        new_x = self.x + dx * speed
-        new_y = self.y + dy * speed
-
-        if new_x - self.r < 0:
-            new_x = self.r
-            dx = -dx
-        elif new_x + self.r > WIDTH:
-            new_x = WIDTH - self.r
-            dx = -dx
-
-        if new_y - self.r < 0:
-            new_y = self.r
-            dy = -dy
-        elif new_y + self.r > HEIGHT:
-            new_y = HEIGHT - self.r
-            dy = -dy
-
-        self.x = new_x
-        self.y = new_y
-        self.dir = (dx, dy)
-
-        if random.random() < 0.2:
-            self.dir = random.choice(DIRECTIONS)
-
-        self.update_canvas_pos()
-
-
-# --------------------
-# UTILS
-# --------------------
-def distance(a, b):
-    return math.hypot(a.x - b.x, a.y - b.y)
-
-
-def create_dna(canvas, num_junk, num_virus):
-    dna_list = []
-
-    virus_dwell_times = generate_virus_dwell_times(num_virus)
-    virus_idx = 0
+        self.image.configure(data=self.header + self.buf.tobytes())
 
-    # junk DNA
-    for _ in range(num_junk):
-        x = random.uniform(DNA_RADIUS, WIDTH - DNA_RADIUS)
-        y = random.uniform(DNA_RADIUS, HEIGHT - DNA_RADIUS)
-        dna_list.append(DNA(canvas, x, y, DNA_RADIUS, "junk"))
 
-    # virus DNA
-    for _ in range(num_virus):
-        x = random.uniform(DNA_RADIUS, WIDTH - DNA_RADIUS)
-        y = random.uniform(DNA_RADIUS, HEIGHT - DNA_RADIUS)
-        d = DNA(canvas, x, y, DNA_RADIUS, "virus")
-        d.virus_bind_time = virus_dwell_times[virus_idx]
-        virus_idx += 1
-        dna_list.append(d)
+class EventTimes(SimObserver):
+    """Sim times of virus kills and junk checks, for the end-of-run histograms."""
 
-    return dna_list
+    def __init__(self):
+        self.capture_times = []
+        self.junk_check_times = []
 
+    def on_capture(self, sim, cas9, dna):
+        self.capture_times.append(sim.sim_time)
 
-def create_cas9(canvas, num_cas9):
-    lst = []
-    for _ in range(num_cas9):
-        x = random.uniform(CAS9_RADIUS, WIDTH - CAS9_RADIUS)
-        y = random.uniform(CAS9_RADIUS, HEIGHT - CAS9_RADIUS)
-        lst.append(Cas9(canvas, x, y, CAS9_RADIUS))
-    return lst
+    def on_junk_check(self, sim, cas9, dna):
+        self.junk_check_times.append(sim.sim_time)
 
 
 # --------------------
 # MAIN
 # --------------------
 def main():
+    import tkinter as tk
+
     root = tk.Tk()
     root.title("Cas9 Search Experiment - 20s Cutoff")
 
@@ -359,41 +256,82 @@ def main():
     virus_var = tk.IntVar(value=NUM_VIRUS_DNA)
     cas9_var = tk.IntVar(value=NUM_CAS9)
 
+    # raster needs numpy, fall back to the canvas renderer without it
+    renderer_var = tk.StringVar(value=RENDERER if np is not None else "canvas")
+    junk_max, virus_max, cas9_max = SLIDER_MAX[renderer_var.get()]
+
     tk.Label(control_frame, text="Junk DNA", fg="white", bg="gray15").grid(row=0, column=0, sticky="w")
-    tk.Scale(
-        control_frame, from_=0, to=300, orient="horizontal",
+    junk_scale = tk.Scale(
+        control_frame, from_=0, to=junk_max, orient="horizontal",
         variable=junk_var, length=200
-    ).grid(row=0, column=1, padx=5, pady=2)
+    )
+    junk_scale.grid(row=0, column=1, padx=5, pady=2)
 
     tk.Label(control_frame, text="Virus DNA", fg="white", bg="gray15").grid(row=1, column=0, sticky="w")
-    tk.Scale(
-        control_frame, from_=0, to=100, orient="horizontal",
+    virus_scale = tk.Scale(
+        control_frame, from_=0, to=virus_max, orient="horizontal",
         variable=virus_var, length=200
-    ).grid(row=1, column=1, padx=5, pady=2)
+    )
+    virus_scale.grid(row=1, column=1, padx=5, pady=2)
 
     tk.Label(control_frame, text="Cas9", fg="white", bg="gray15").grid(row=2, column=0, sticky="w")
-    tk.Scale(
-        control_frame, from_=0, to=100, orient="horizontal",
+    cas9_scale = tk.Scale(
+        control_frame, from_=0, to=cas9_max, orient="horizontal",
         variable=cas9_var, length=200
-    ).grid(row=2, column=1, padx=5, pady=2)
+    )
+    cas9_scale.grid(row=2, column=1, padx=5, pady=2)
+
+    def on_renderer_change(choice):
+        # the raster renderer can show far bigger populations
+        for scale, top in zip((junk_scale, virus_scale, cas9_scale), SLIDER_MAX[choice]):
+            scale.config(to=top)
+
+    tk.Label(control_frame, text="Renderer", fg="white", bg="gray15").grid(row=3, column=0, sticky="w")
+    renderer_choices = ("canvas", "raster") if np is not None else ("canvas",)
+    tk.OptionMenu(control_frame, renderer_var, *renderer_choices, command=on_renderer_change)\
+        .grid(row=3, column=1, sticky="w", padx=5, pady=2)
 
     start_button = tk.Button(control_frame, text="Start / Restart Experiment")
-    start_button.grid(row=3, column=0, columnspan=2, pady=5)
+    start_button.grid(row=4, column=0, columnspan=2, pady=5)
 
     # Speed slider
     speed_frame = tk.LabelFrame(right_panel, text="Cas9 Speed", fg="white", bg="gray15")
     speed_frame.pack(fill="x", padx=5, pady=5)
 
-    speed_var = tk.IntVar(value=20)
+    speed_var = tk.IntVar(value=CAS9_SPEED)
     tk.Scale(
         speed_frame, from_=1, to=20, orient="horizontal",
         variable=speed_var, length=200
     ).pack(padx=5, pady=5)
 
+    # Sim speed slider (x real time)
+    rate_frame = tk.LabelFrame(right_panel, text="Sim Speed (x real time)", fg="white", bg="gray15")
+    rate_frame.pack(fill="x", padx=5, pady=5)
+
+    rate_var = tk.IntVar(value=1)
+    tk.Scale(
+        rate_frame, from_=1, to=50, orient="horizontal",
+        variable=rate_var, length=200
+    ).pack(padx=5, pady=5)
+
     # Info label
     info_label = tk.Label(right_panel, text="", fg="white", bg="gray15", anchor="w", justify="left")
     info_label.pack(fill="x", padx=5, pady=5)
 
+    # Profiler overlay (only filled in while profiling)
+    profile_frame = tk.LabelFrame(right_panel, text="Profiler", fg="white", bg="gray15")
+    profile_frame.pack(fill="x", padx=5, pady=5)
+
+    profile_var = tk.BooleanVar(value=PROFILE)
+    tk.Checkbutton(
+        profile_frame, text="Profile next experiment", variable=profile_var,
+        fg="white", bg="gray15", selectcolor="gray30"
+    ).pack(anchor="w", padx=5)
+
+    profile_label = tk.Label(profile_frame, text="", fg="white", bg="gray15",
+                             anchor="w", justify="left", font=("Courier", 9))
+    profile_label.pack(fill="x", padx=5, pady=2)
+
     # Legend / basic info
     legend_frame = tk.LabelFrame(right_panel, text="Legend", fg="white", bg="gray15")
     legend_frame.pack(fill="x", padx=5, pady=5)
@@ -417,14 +355,20 @@ def main():
                "Gray small: junk DNA", 4)
 
     # Simulation state
-    dna_list = []
-    cas9_list = []
-    capture_times = []       # virus kills
-    junk_check_times = []    # junk DNA checked by Cas9
-    start_time = None
+    sim = None               # core Simulation of the running experiment
+    times = EventTimes()     # virus kills / junk checks of that experiment
+    renderers = {"canvas": CanvasRenderer(canvas)}   # raster made on first use
+    renderer = None
+    tick_budget = 0.0        # sim seconds owed to the physics since the last frame
+    last_wall = None
     experiment_running = False
 
     def end_experiment():
+        import matplotlib.pyplot as plt   # for histograms
+
+        capture_times = times.capture_times
+        junk_check_times = times.junk_check_times
+
         # histograms of virus kills and junk checks per time bin
         n_bins = int(EXPERIMENT_DURATION // BIN_WIDTH)
         counts_virus = [0] * n_bins
@@ -462,121 +406,124 @@ def main():
         plt.show()
 
     def start_experiment():
-        nonlocal dna_list, cas9_list, capture_times, junk_check_times, start_time, experiment_running
+        nonlocal sim, times, renderer
+        nonlocal tick_budget, last_wall, experiment_running
 
-        # Close old plots
-        plt.close('all')
+        # Close old plots (pyplot is only loaded once a histogram was shown)
+        if "matplotlib.pyplot" in sys.modules:
+            sys.modules["matplotlib.pyplot"].close('all')
 
         # Clear old objects from canvas (except timer text)
-        for d in dna_list:
-            canvas.delete(d.id)
-        for c in cas9_list:
-            canvas.delete(c.id)
+        if renderer is not None:
+            renderer.clear()
 
-        # Create new population using slider values
-        num_junk = junk_var.get()
-        num_virus = virus_var.get()
-        num_cas9 = cas9_var.get()
+        # raster mode draws every particle into one image instead of ovals
+        choice = renderer_var.get()
+        if choice not in renderers:
+            renderers[choice] = RasterRenderer(root, canvas)
+        renderer = renderers[choice]
 
-        dna_list = create_dna(canvas, num_junk, num_virus)
-        cas9_list = create_cas9(canvas, num_cas9)
+        # Create new population using slider values
+        times = EventTimes()
+        sim = Simulation(
+            junk_var.get(), virus_var.get(), cas9_var.get(),
+            random.Random(SEED), speed=speed_var.get(),
+            observers=(renderer, times),
+            profiler=PhaseProfiler() if profile_var.get() else None
+        )
+        renderer.attach(sim)
 
-        capture_times = []
-        junk_check_times = []
-        start_time = time.perf_counter()
+        tick_budget = 0.0
+        last_wall = time.perf_counter()
         experiment_running = True
 
-        info_label.config(text="Experiment Running...")
-        canvas.itemconfig(timer_id, text="Time: 00:00")
+        set_info("Experiment Running...")
+        set_text(timer_id, "Time: 00:00")
 
     # bind button to start_experiment
     start_button.config(command=start_experiment)
 
-    def update():
-        nonlocal dna_list, cas9_list, start_time, experiment_running, capture_times, junk_check_times
+    def render():
+        """Push the current state to Tk; items that did not change are skipped."""
+        if sim.profiler is None:
+            renderer.draw(sim)
+        else:
+            sim.profiler.time("render", lambda: renderer.draw(sim))
+        set_profile(profile_text(sim.profiler))
+
+        sim_time = sim.sim_time
+        dna_list = sim.dna_list
+        minutes = int(sim_time // 60)
+        seconds = int(sim_time % 60)
+        set_text(timer_id, f"Time: {minutes:02d}:{seconds:02d}")
+        set_info(f"Junk: {sum(d.kind == 'junk' for d in dna_list)}  |  "
+                 f"Virus: {sum(d.kind == 'virus' for d in dna_list)}  |  "
+                 f"Free Cas9: {sim.n_free}")
+
+    shown = {}
+
+    def set_text(item, text):
+        if shown.get(item) != text:
+            canvas.itemconfig(item, text=text)
+            shown[item] = text
 
-        # Always reschedule update loop
-        root.after(UPDATE_INTERVAL_MS, update)
+    def set_info(text):
+        if shown.get("info") != text:
+            info_label.config(text=text)
+            shown["info"] = text
 
-        if not experiment_running or start_time is None:
+    def set_profile(text):
+        if shown.get("profile") != text:
+            profile_label.config(text=text)
+            shown["profile"] = text
+
+    def profile_text(profiler):
+        if profiler is None:
+            return ""
+        summary = profiler.summary()
+        lines = [f"{phase:<11}{summary['ms_per_tick'][phase]:8.3f} ms/tick" for phase in PHASES]
+        lines += [f"{name:<19}{n:>8d}" for name, n in summary["counts"].items()]
+        return "\n".join(lines)
+
+    def frame():
+        nonlocal tick_budget, last_wall, experiment_running
+
+        # Always reschedule the render loop
+        root.after(1000 // RENDER_FPS, frame)
+
+        if not experiment_running:
             return
 
+        dt = UPDATE_INTERVAL_MS / 1000.0
         now = time.perf_counter()
-        sim_time = now - start_time
-
-        if sim_time >= EXPERIMENT_DURATION:
-            canvas.itemconfig(timer_id, text=f"Time: {int(sim_time):02d}")
-            info_label.config(text="Experiment Complete")
+        tick_budget += (now - last_wall) * rate_var.get()
+        last_wall = now
+
+        sim.speed = speed_var.get()
+        ticks = 0
+        while tick_budget >= dt and sim.sim_time < EXPERIMENT_DURATION:
+            sim.step()
+            tick_budget -= dt
+            ticks += 1
+            if ticks >= MAX_TICKS_PER_FRAME or time.perf_counter() - now > 1.0 / RENDER_FPS:
+                # can't keep up: slow the sim down instead of piling up debt
+                tick_budget = 0.0
+                break
+
+        render()
+
+        if sim.sim_time >= EXPERIMENT_DURATION:
+            set_text(timer_id, f"Time: {int(sim.sim_time):02d}")
+            set_info("Experiment Complete")
             experiment_running = False
-            if capture_times or junk_check_times:
+            if sim.profiler is not None:
+                print(json.dumps({"init_junk": sim.num_junk, "init_virus": sim.num_virus,
+                                  "init_cas9": sim.num_cas9, **sim.profiler.summary()}))
+            if times.capture_times or times.junk_check_times:
                 end_experiment()
-            return
-
-        minutes = int(sim_time // 60)
-        seconds = int(sim_time % 60)
-        canvas.itemconfig(timer_id, text=f"Time: {minutes:02d}:{seconds:02d}")
-
-        speed = speed_var.get()
-
-        for d in dna_list:
-            d.move_step(speed)
-        for c in cas9_list:
-            c.move_step(speed, sim_time)
-
-        # collisions
-        for c in cas9_list:
-            if not c.alive or c.state != "free":
-                continue
-
-            for d in dna_list:
-                if not d.alive:
-                    continue
-
-                # global cooldown (junk or virus)
-                if sim_time < d.cooldown_until:
-                    continue
-
-                # virus already occupied by a failed-check Cas9
-                if d.kind == "virus" and d.bound:
-                    continue
-
-                if distance(c, d) <= (c.r + d.r + COLLISION_BUFFER):
-                    if d.kind == "junk":
-                        # log time when junk DNA is checked
-                        junk_check_times.append(sim_time)
-
-                        bind_time = d.junk_bind_time if d.junk_bind_time is not None else BIND_TIME_JUNK
-                        c.bind_to(d, sim_time, bind_time, "bound_junk")
-
-                    else:  # virus
-                        p = random.random()
-                        if p <= SUCCESS_PROB:
-                            # IMMEDIATE SUCCESS: no dwell, both disappear
-                            capture_times.append(sim_time)
-                            d.alive = False
-                            canvas.delete(d.id)
-                            c.alive = False
-                            canvas.delete(c.id)
-                        else:
-                            # FAILED MATCH: dwell for virus_bind_time, then detach
-                            d.bound = True
-                            d.cooldown_until = sim_time + COOLDOWN_VIRUS_FAIL
-                            bind_time = (d.virus_bind_time * TIME_SCALE) if d.virus_bind_time is not None else BIND_TIME_VIRUS
-                            c.bind_to(d, sim_time, bind_time, "bound_virus")
-                        # either way, this Cas9 is done with collisions this step
-                    break
-
-        dna_list = [d for d in dna_list if d.alive]
-        cas9_list = [c for c in cas9_list if c.alive]
-
-        info_label.config(
-            text=f"Junk: {sum(d.kind == 'junk' for d in dna_list)}  |  "
-                 f"Virus: {sum(d.kind == 'virus' for d in dna_list)}  |  "
-                 f"Free Cas9: {sum(c.state == 'free' for c in cas9_list)}"
-        )
 
-    # kick off the update loop (simulation starts only when button pressed)
-    update()
+    # kick off the render loop (simulation starts only when button pressed)
+    frame()
     root.mainloop()
 
 
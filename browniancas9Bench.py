@@ -0,0 +1,251 @@
+# PHYS4251/6250
+# Group 9
+# Maxwell Hadaway, Kenechukwu Aniedobe, Michael Olatunji
+# Throughput benchmark for the simulation engines (no GUI)
+#
+#   python browniancas9Bench.py                       # full matrix -> bench_results.json
+#   python browniancas9Bench.py --sizes 100,1000 --engines python
+#   python browniancas9Bench.py --baseline bench_baseline.json
+#
+# Commit a bench_results.json as the baseline, then run with --baseline
+# after touching the collision loop / move_step to see what got faster.
+
+import argparse
+import datetime
+import importlib.metadata
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from browniancas9Core import UPDATE_INTERVAL_MS, PhaseProfiler
+from browniancas9Datamine import ENGINES, HAVE_NUMBA, prepare_numba, run_single_sim
+
+# --------------------
+# CONFIG
+# --------------------
+# total particles (junk + virus + Cas9) per case, all in the same box, so
+# the size is also the density
+BENCH_SIZES = (10, 100, 1000, 10_000, 100_000)
+
+# largest default size per engine: 10^5 particles take minutes per run
+# there, hours for the whole default matrix (sizes given with --sizes
+# always run)
+ENGINE_MAX_SIZE = {"python": 10_000, "numpy": 10_000}
+
+# how a case's particles are split between junk, virus and Cas9
+BENCH_MIXES = {
+    "junk_heavy": (0.8, 0.1, 0.1),
+    "balanced": (1 / 3, 1 / 3, 1 / 3),
+    "cas9_heavy": (0.2, 0.2, 0.6),
+}
+
+BENCH_TICKS = 25           # ticks per timed run (0.5 s of sim time)
+BENCH_REPEATS = 3          # timed runs per case, the fastest one is kept
+MEMORY_TICKS = 5           # ticks of the extra traced run that measures memory
+BENCH_SEED = 0             # fixed so every run benchmarks the same trajectories
+
+OUTPUT_FILE = "bench_results.json"
+REGRESSION_TOLERANCE = 0.10    # --baseline flags cases more than 10 % slower
+
+
+# --------------------
+# CASES
+# --------------------
+def split_population(size, mix):
+    """(junk, virus, cas9) for `size` particles, at least one virus and one Cas9."""
+    fj, fv, _ = BENCH_MIXES[mix]
+    virus = max(1, round(size * fv))
+    junk = max(0, round(size * fj))
+    cas9 = max(1, size - junk - virus)
+    return junk, virus, cas9
+
+
+def bench_cases(engines, sizes, mixes, max_size=None):
+    """(engine, mix, populations) per case; max_size: {engine: largest size to run}."""
+    for engine in engines:
+        cap = (max_size or {}).get(engine)
+        for mix in mixes:
+            for size in sizes:
+                if cap is None or size <= cap:
+                    yield engine, mix, split_population(size, mix)
+
+
+def case_key(row):
+    return row["engine"], row["mix"], row["junk"], row["virus"], row["cas9"]
+
+
+# --------------------
+# MEASUREMENT
+# --------------------
+def timed_run(engine, junk, virus, cas9, ticks, seed):
+    """One run of `ticks` ticks: (wall seconds, ticks actually stepped)."""
+    profiler = PhaseProfiler()
+    duration = ticks * UPDATE_INTERVAL_MS / 1000.0
+    t0 = time.perf_counter()
+    run_single_sim(junk, virus, cas9, engine=engine, seed=seed,
+                   profiler=profiler, duration=duration)
+    return time.perf_counter() - t0, profiler.counts["ticks"]
+
+
+def warm_up(engine, seed):
+    """
+    One untimed one-tick run, so per-process setup (the numba kernels,
+    the ssa engine's search areas) isn't timed in the engine's first case.
+    """
+    timed_run(engine, 1, 1, 1, 1, seed)
+
+
+def peak_memory(engine, junk, virus, cas9, ticks, seed):
+    """Peak traced allocation (MB) of a short run, setup included."""
+    tracemalloc.start()
+    try:
+        timed_run(engine, junk, virus, cas9, ticks, seed)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def bench_case(engine, mix, junk, virus, cas9, ticks, repeats, seed):
+    """
+    Best-of-`repeats` wall time for `ticks` ticks. Ticks are the ones the
+    engine really stepped (an early finish counts fewer), and particle
+    updates are those ticks times the starting population.
+    """
+    best, stepped = min(timed_run(engine, junk, virus, cas9, ticks, seed) for _ in range(repeats))
+    n = junk + virus + cas9
+    return {
+        "engine": engine, "mix": mix,
+        "junk": junk, "virus": virus, "cas9": cas9, "particles": n,
+        "ticks": stepped,
+        "wall_seconds": round(best, 6),
+        "ticks_per_second": round(stepped / best, 3) if best > 0 else None,
+        "particle_updates_per_second": round(stepped * n / best, 1) if best > 0 else None,
+        "peak_memory_mb": round(peak_memory(engine, junk, virus, cas9, min(ticks, MEMORY_TICKS), seed), 3),
+    }
+
+
+def bench_meta(args):
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__ if np is not None else None,
+        "numba": importlib.metadata.version("numba") if HAVE_NUMBA else None,
+        "platform": platform.platform(),
+        "ticks": args.ticks, "repeats": args.repeats, "seed": args.seed,
+    }
+
+
+# --------------------
+# BASELINE COMPARISON
+# --------------------
+def compare(results, baseline, tolerance):
+    """Print new vs baseline ticks/s per case; returns the regressed cases."""
+    old = {case_key(row): row for row in baseline["results"]}
+    regressions = []
+    print(f"\n{'engine':<8}{'mix':<12}{'particles':>10}{'base t/s':>12}{'new t/s':>12}{'speedup':>9}")
+    for row in results:
+        base = old.get(case_key(row))
+        if base is None or not base["ticks_per_second"] or not row["ticks_per_second"]:
+            continue
+        speedup = row["ticks_per_second"] / base["ticks_per_second"]
+        flag = ""
+        if speedup < 1 - tolerance:
+            flag = "  <-- slower"
+            regressions.append(row)
+        print(f"{row['engine']:<8}{row['mix']:<12}{row['particles']:>10}"
+              f"{base['ticks_per_second']:>12.1f}{row['ticks_per_second']:>12.1f}{speedup:>8.2f}x{flag}")
+    return regressions
+
+
+# --------------------
+# MAIN
+# --------------------
+def int_list(text):
+    return [int(float(v)) for v in text.split(",")]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Cas9 simulation engines")
+    installed = [e for e in ENGINES if e != "numba" or HAVE_NUMBA]
+    parser.add_argument("--engines", default=",".join(installed),
+                        help=f"comma-separated engines from {','.join(ENGINES)}")
+    parser.add_argument("--sizes", type=int_list, default=None,
+                        help=f"comma-separated total particle counts (1e4 style is fine); by "
+                             f"default {','.join(map(str, BENCH_SIZES))}, python and numpy only "
+                             f"up to {max(ENGINE_MAX_SIZE.values())}")
+    parser.add_argument("--mixes", default=",".join(BENCH_MIXES),
+                        help=f"comma-separated population mixes from {','.join(BENCH_MIXES)}")
+    parser.add_argument("--ticks", type=int, default=BENCH_TICKS,
+                        help="ticks per timed run")
+    parser.add_argument("--repeats", type=int, default=BENCH_REPEATS,
+                        help="timed runs per case (the fastest is reported)")
+    parser.add_argument("--seed", type=int, default=BENCH_SEED)
+    parser.add_argument("--output", default=OUTPUT_FILE,
+                        help="where to write the JSON results")
+    parser.add_argument("--baseline", default=None,
+                        help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="relative slowdown vs the baseline that counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    engines = args.engines.split(",")
+    mixes = args.mixes.split(",")
+    for engine in engines:
+        if engine not in ENGINES:
+            raise SystemExit(f"unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+        if engine in ("numpy", "ssa") and np is None:
+            raise SystemExit(f"the {engine} engine needs numpy installed")
+        if engine == "numba" and not HAVE_NUMBA:
+            raise SystemExit("the numba engine needs numba installed")
+    for mix in mixes:
+        if mix not in BENCH_MIXES:
+            raise SystemExit(f"unknown mix {mix!r}, expected one of {', '.join(BENCH_MIXES)}")
+
+    if "numba" in engines:
+        prepare_numba()     # keep the compile out of the timed runs
+    for engine in engines:
+        warm_up(engine, args.seed)
+
+    if args.sizes is None:
+        sizes, max_size = list(BENCH_SIZES), ENGINE_MAX_SIZE
+        for engine, cap in max_size.items():
+            if engine in engines and cap < max(sizes):
+                print(f"{engine}: sizes above {cap} skipped (give --sizes to run them)")
+    else:
+        sizes, max_size = args.sizes, None
+
+    results = []
+    for engine, mix, (junk, virus, cas9) in bench_cases(engines, sizes, mixes, max_size):
+        row = bench_case(engine, mix, junk, virus, cas9, args.ticks, args.repeats, args.seed)
+        results.append(row)
+        print(f"{engine:<8}{mix:<12}junk={junk:<7d}virus={virus:<7d}cas9={cas9:<7d}"
+              f"{row['ticks_per_second']:>10.1f} ticks/s"
+              f"{row['particle_updates_per_second']:>14.0f} updates/s"
+              f"{row['peak_memory_mb']:>10.1f} MB")
+
+    with open(args.output, "w") as f:
+        json.dump({"meta": bench_meta(args), "results": results}, f, indent=1)
+    print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) more than {args.tolerance:.0%} slower than {args.baseline}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
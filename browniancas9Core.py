@@ -0,0 +1,1109 @@
+# PHYS4251/6250
+# Group 9
+# Maxwell Hadaway, Kenechukwu Aniedobe, Michael Olatunji
+# Headless simulation core shared by the GUI (brownianCas9V7.py) and the
+# batch sweeps (browniancas9Datamine.py). No tkinter / matplotlib here.
+
+import heapq
+import math
+import random
+import time
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:       # only needed for vectorized DwellTimeSampler.draw
+    np = None
+
+# --------------------
+# CONFIG (model constants, the same for every front end)
+# --------------------
+WIDTH, HEIGHT = 1000, 1000
+
+TIME_SCALE = 0.2
+
+DNA_RADIUS = 10
+CAS9_RADIUS = 20
+
+DIRECTIONS = [
+    (0, -1), (0, 1), (-1, 0), (1, 0),
+    (-1, -1), (1, -1), (-1, 1), (1, 1)
+]
+
+UPDATE_INTERVAL_MS = 20       # used as fixed dt = 0.02 s
+BIND_TIME_JUNK = 1.0          # fallback, junk uses its own sampled time
+BIND_TIME_VIRUS = 2.0         # fallback, virus uses its own sampled time
+
+COOLDOWN_JUNK = 2.5
+COOLDOWN_VIRUS_FAIL = 2.5     # virus ignore time after failed check
+
+COLLISION_BUFFER = 0.0
+
+# success probability: P(immediate cut when Cas9 hits a virus)
+SUCCESS_PROB = 0.8
+
+# Scale virus dwell times so they don't exceed ~12 s
+VIRUS_TIME_SCALE = 0.27   # 0.27 * 43.7 ≈ 11.8 s max for strongest bind
+
+# default Cas9 speed (the GUI slider starts here, the batch always uses it)
+CAS9_SPEED = 20
+
+# chance per tick of UPDATE_INTERVAL_MS to turn to a random new direction
+DNA_TURN_PROB = 0.1
+CAS9_TURN_PROB = 0.2
+
+# --------------------
+# JUNK DNA MISMATCH DISTRIBUTION
+# --------------------
+JUNK_DISTANCES = list(range(1, 11))   # 1..10
+
+_raw_p = [0.75 * (0.25 ** (n - 1)) for n in JUNK_DISTANCES]
+_raw_sum = sum(_raw_p)
+JUNK_PROBS = [v / _raw_sum for v in _raw_p]
+
+
+# --------------------
+# DWELL-TIME SAMPLERS (alias tables)
+# --------------------
+class DwellTimeSampler:
+    """
+    Draws from a fixed discrete distribution over a handful of dwell
+    times with a Walker/Vose alias table: one uniform per draw, no
+    per-call weight list. Built once per model, reused for every DNA.
+
+    rng can be a random.Random (object engine) or a numpy Generator;
+    with a Generator, draw(rng, n) is a single vectorized call.
+    """
+
+    def __init__(self, probs, times):
+        k = len(probs)
+        total = sum(probs)
+        scaled = [p * k / total for p in probs]
+        prob = [1.0] * k
+        alias = list(range(k))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            lo, hi = small.pop(), large.pop()
+            prob[lo] = scaled[lo]
+            alias[lo] = hi
+            scaled[hi] += scaled[lo] - 1.0
+            (small if scaled[hi] < 1.0 else large).append(hi)
+        # leftovers are 1 up to rounding: they keep prob 1 and alias themselves
+
+        self.k = k
+        self.prob = prob
+        self.alias = alias
+        self.times = list(times)
+        if np is not None:
+            self.prob_np = np.array(prob)
+            self.alias_np = np.array(alias, dtype=np.intp)
+            self.times_np = np.array(self.times)
+
+    def sample(self, rng):
+        x = rng.random() * self.k
+        i = int(x)
+        if x - i >= self.prob[i]:
+            i = self.alias[i]
+        return self.times[i]
+
+    def draw(self, rng, n):
+        """n dwell times: an ndarray for a numpy Generator, else a list."""
+        if isinstance(rng, random.Random):
+            return [self.sample(rng) for _ in range(n)]
+        x = rng.random(n) * self.k
+        i = x.astype(np.intp)
+        i = np.where(x - i < self.prob_np[i], i, self.alias_np[i])
+        return self.times_np[i]
+
+
+# t_bound = 0.0026 * exp(0.9729 * n) for each of the ten mismatch distances
+JUNK_SAMPLER = DwellTimeSampler(
+    JUNK_PROBS, [0.0026 * math.exp(0.9729 * n) for n in JUNK_DISTANCES])
+
+
+def virus_sampler(virus_time_scale):
+    """virus: distance' = -distance + 11, then scaled by virus_time_scale."""
+    return DwellTimeSampler(
+        JUNK_PROBS, [0.0026 * math.exp(0.9729 * (-n + 11)) * virus_time_scale for n in JUNK_DISTANCES])
+
+
+VIRUS_SAMPLER = virus_sampler(VIRUS_TIME_SCALE)
+
+
+@lru_cache(maxsize=None)
+def dwell_samplers(virus_time_scale):
+    """(junk, virus) samplers for a virus time scale, each table built once."""
+    if virus_time_scale == VIRUS_TIME_SCALE:
+        return JUNK_SAMPLER, VIRUS_SAMPLER
+    return JUNK_SAMPLER, virus_sampler(virus_time_scale)
+
+
+def sample_junk_bind_time(rng):
+    """
+    Sample a mismatch 'distance' n from {1..10} with P(n),
+    then compute t_bound = 0.0026 * exp(0.9729 * n).
+    (Your first MATLAB model for junk DNA.)
+    Drawn from the precomputed JUNK_SAMPLER table.
+    """
+    return JUNK_SAMPLER.sample(rng)
+
+
+# --------------------
+# VIRUS MISMATCH / BIND-TIME MODEL (from your MATLAB code)
+# --------------------
+def generate_virus_dwell_times(n, rng):
+    """
+    MATLAB logic:
+
+      x = 1:10;
+      p = 0.75 * 0.25^(x-1); p = p / sum(p);
+      distance = randsample(x, ..., p);
+      distance' = -distance + 11;
+      t_bound = 0.0026 * exp(0.9729 * distance');
+
+    Then scaled by VIRUS_TIME_SCALE so max is ~12 s.
+    Same distribution as JUNK_PROBS, so VIRUS_SAMPLER is built from it
+    once and all n times come from one draw() call.
+    """
+    return VIRUS_SAMPLER.draw(rng, n)
+
+
+# --------------------
+# SIMULATION CONFIG (immutable, handed to the engines)
+# --------------------
+CONFIG_FIELDS = (
+    "width", "height", "time_scale", "dna_radius", "cas9_radius",
+    "bind_time_junk", "bind_time_virus", "cooldown_junk", "cooldown_virus_fail",
+    "collision_buffer", "success_prob", "virus_time_scale", "cas9_speed",
+    "dna_turn_prob", "cas9_turn_prob",
+)
+
+
+class SimConfig(namedtuple("SimConfig", CONFIG_FIELDS, defaults=(
+        WIDTH, HEIGHT, TIME_SCALE, DNA_RADIUS, CAS9_RADIUS,
+        BIND_TIME_JUNK, BIND_TIME_VIRUS, COOLDOWN_JUNK, COOLDOWN_VIRUS_FAIL,
+        COLLISION_BUFFER, SUCCESS_PROB, VIRUS_TIME_SCALE, CAS9_SPEED,
+        DNA_TURN_PROB, CAS9_TURN_PROB))):
+    """
+    The model parameters of one simulation, each defaulting to its CONFIG
+    constant above (success_prob <- SUCCESS_PROB, ...). The engines read
+    only the config they are handed, so runs with different parameters
+    can share a process or a worker pool; vary one with
+    DEFAULT_CONFIG._replace(success_prob=0.6).
+    """
+    __slots__ = ()
+
+    @property
+    def contact_distance(self):
+        """Centre distance at which a Cas9 touches a DNA (and the hash cell size)."""
+        return self.cas9_radius + self.dna_radius + self.collision_buffer
+
+    def samplers(self):
+        """(junk, virus) DwellTimeSampler of this config."""
+        return dwell_samplers(self.virus_time_scale)
+
+
+DEFAULT_CONFIG = SimConfig()
+
+
+# --------------------
+# CLASSES
+# --------------------
+class DNA:
+    def __init__(self, x, y, radius, kind, rng, config=DEFAULT_CONFIG):
+        self.rng = rng          # random.Random owned by this simulation
+        self.x = x
+        self.y = y
+        self.r = radius
+        self.width, self.height = config.width, config.height
+        self.kind = kind        # 'junk' or 'virus'
+        self.alive = True
+        self.dir = rng.choice(DIRECTIONS)
+        self.cooldown_until = 0.0
+        self.bound = False      # prevents multi-Cas9 binding
+        self.cooling = False    # on cooldown (cleared by the event queue)
+        self.index = 0          # position in dna_list (set in create_dna)
+        self.cell = None        # SpatialHash cell
+        self.px, self.py = x, y  # position at the start of the tick (swept collisions)
+
+        if self.kind == "junk":
+            self.junk_bind_time = config.samplers()[0].sample(rng)
+        else:
+            self.junk_bind_time = None
+
+        # virus-specific bind time (set later in create_dna)
+        self.virus_bind_time = None
+
+    def move_step(self, speed, p_turn=DNA_TURN_PROB):
+        if not self.alive:
+            return
+
+        dx, dy = self.dir
+        new_x = self.x + dx * speed * 0.3
+        new_y = self.y + dy * speed * 0.3
+
+        # walls
+        if new_x - self.r < 0:
+            new_x = self.r
+            dx = -dx
+        elif new_x + self.r > self.width:
+            new_x = self.width - self.r
+            dx = -dx
+
+        if new_y - self.r < 0:
+            new_y = self.r
+            dy = -dy
+        elif new_y + self.r > self.height:
+            new_y = self.height - self.r
+            dy = -dy
+
+        self.x = new_x
+        self.y = new_y
+        self.dir = (dx, dy)
+
+        if self.rng.random() < p_turn:
+            self.dir = self.rng.choice(DIRECTIONS)
+
+
+class Cas9:
+    def __init__(self, x, y, radius, rng, config=DEFAULT_CONFIG):
+        self.rng = rng
+        self.x = x
+        self.y = y
+        self.r = radius
+        self.width, self.height = config.width, config.height
+        self.cooldown_junk = config.cooldown_junk
+
+        self.dir = rng.choice(DIRECTIONS)
+        self.state = "free"       # 'free', 'bound_junk', 'bound_virus'
+        self.bound_to = None
+        self.bound_until = 0.0
+        self.alive = True
+        # swept collisions: the current leg runs from (px, py) at time pt
+        # to (x, y) at time qt, heading dir and then qdir from its end on;
+        # path holds the later legs' ends (reversed). fresh: the leg's start
+        # has not been looked at yet (just released)
+        self.px, self.py = x, y
+        self.pt = self.qt = 0.0
+        self.qdir = self.dir
+        self.path = []
+        self.fresh = False
+
+    def bind_to(self, dna, now, bind_time, state_name):
+        self.state = state_name
+        self.bound_to = dna
+        self.bound_until = now + bind_time
+        self.x, self.y = dna.x, dna.y
+
+    def release(self, now):
+        """Detach from the bound DNA and return it."""
+        dna = self.bound_to
+        self.x, self.y = dna.x, dna.y
+
+        # junk: detach and put junk on cooldown
+        if self.state == "bound_junk":
+            if dna.alive:
+                dna.cooldown_until = now + self.cooldown_junk
+
+        # virus: this state now means FAILED recognition dwell
+        elif self.state == "bound_virus":
+            if dna.alive:
+                dna.bound = False
+                # virus cooldown was set at collision time
+
+        self.state = "free"
+        self.bound_to = None
+        return dna
+
+    def move_step(self, speed, p_turn=CAS9_TURN_PROB):
+        """Brownian step of a FREE Cas9; bound ones sit on their DNA until release()."""
+        dx, dy = self.dir
+        new_x = self.x + dx * speed
+        new_y = self.y + dy * speed
+
+        if new_x - self.r < 0:
+            new_x = self.r
+            dx = -dx
+        elif new_x + self.r > self.width:
+            new_x = self.width - self.r
+            dx = -dx
+
+        if new_y - self.r < 0:
+            new_y = self.r
+            dy = -dy
+        elif new_y + self.r > self.height:
+            new_y = self.height - self.r
+            dy = -dy
+
+        self.x = new_x
+        self.y = new_y
+        self.dir = (dx, dy)
+
+        if self.rng.random() < p_turn:
+            self.dir = self.rng.choice(DIRECTIONS)
+
+    def swept_move(self, speed, scale, p_turn):
+        """
+        Free motion over `scale` base ticks of `speed` each, for swept runs:
+        the path `scale` move_step calls would take, turns and wall bounces
+        included, as its corners [(x, y, fraction of the move, heading from
+        there on), ...] ending at 1.0. A straight run until the next turn
+        is one geometric draw instead of one draw per tick, so long ticks
+        stay cheap without making the walk any straighter than at the base
+        dt.
+        """
+        r = self.r
+        width, height = self.width, self.height
+        path = []
+        done = 0.0
+        while done < scale:
+            # base ticks until the next turn (it comes after the run-th move)
+            run = math.inf
+            if p_turn > 0:
+                run = math.floor(math.log(1.0 - self.rng.random()) / math.log(1.0 - p_turn)) + 1
+            leg = min(run, scale - done)
+            turns = run <= leg
+
+            while leg > 0:
+                # straight ahead, up to the step that hits a wall
+                step = leg
+                for u, d, hi in ((self.x, self.dir[0], width - r), (self.y, self.dir[1], height - r)):
+                    wall = hi if d > 0 else r
+                    if d != 0 and abs(wall - u) < speed * leg:
+                        step = min(step, math.floor(abs(wall - u) / speed) + 1)
+                dx, dy = self.dir
+                x, y = self.x + dx * speed * step, self.y + dy * speed * step
+                if x < r or x > width - r:
+                    dx = -dx
+                if y < r or y > height - r:
+                    dy = -dy
+                self.x, self.y = min(max(x, r), width - r), min(max(y, r), height - r)
+                self.dir = (dx, dy)
+                done += step
+                leg -= step
+                path.append((self.x, self.y, done / scale, self.dir))
+
+            if turns:
+                self.dir = self.rng.choice(DIRECTIONS)
+                path[-1] = (self.x, self.y, done / scale, self.dir)
+        return path
+
+
+# --------------------
+# UTILS
+# --------------------
+def distance(a, b):
+    return math.hypot(a.x - b.x, a.y - b.y)
+
+
+def contact_span(dx, dy, vx, vy, r):
+    """
+    (t_in, t_out) between which |(dx, dy) + t * (vx, vy)| <= r, else None.
+    (dx, dy) is the separation at the start of a leg and (vx, vy) how much
+    it changes over the leg (both particles moving in straight lines); the
+    whole leg (0, 1) if it does not change.
+    """
+    c = dx * dx + dy * dy - r * r
+    a = vx * vx + vy * vy
+    if a == 0:
+        return (0.0, 1.0) if c <= 0 else None
+    b = dx * vx + dy * vy
+    disc = b * b - a * c
+    if disc < 0:
+        return None             # closest approach is still too far
+    root = math.sqrt(disc)
+    return (-b - root) / a, (-b + root) / a
+
+
+def turn_prob(p, scale):
+    """Chance to turn at least once in `scale` base ticks, p per base tick."""
+    return p if scale == 1 else 1 - (1 - p) ** scale
+
+
+# --------------------
+# SPATIAL HASH (broad phase for collisions)
+# --------------------
+USE_SPATIAL_HASH = True
+
+# a Cas9 can only touch a DNA closer than this, so with cells this wide
+# every possible contact is in the Cas9's own cell or one of its 8 neighbours
+CELL_SIZE = CAS9_RADIUS + DNA_RADIUS + COLLISION_BUFFER
+
+
+class SpatialHash:
+    """
+    Uniform grid (cell list) of the live DNA.
+
+    DNA are inserted once and only change cell when they cross a cell
+    edge, so keeping the grid current costs O(1) per move. nearby()
+    returns the candidates sorted by DNA index, i.e. in the same order
+    as dna_list, so the collision loop keeps its first-match `break`.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def _key(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, obj):
+        obj.cell = self._key(obj.x, obj.y)
+        self.cells.setdefault(obj.cell, []).append(obj)
+
+    def remove(self, obj):
+        bucket = self.cells[obj.cell]
+        bucket.remove(obj)
+        if not bucket:
+            del self.cells[obj.cell]
+
+    def move(self, obj):
+        key = self._key(obj.x, obj.y)
+        if key != obj.cell:
+            self.remove(obj)
+            obj.cell = key
+            self.cells.setdefault(key, []).append(obj)
+
+    def nearby(self, x, y):
+        cx, cy = self._key(x, y)
+        found = []
+        for ix in (cx - 1, cx, cx + 1):
+            for iy in (cy - 1, cy, cy + 1):
+                bucket = self.cells.get((ix, iy))
+                if bucket:
+                    found.extend(bucket)
+        found.sort(key=lambda d: d.index)
+        return found
+
+    def in_box(self, x0, y0, x1, y1):
+        """DNA in the cells overlapping the box [x0, x1] x [y0, y1], in index order."""
+        kx0, ky0 = self._key(x0, y0)
+        kx1, ky1 = self._key(x1, y1)
+        found = []
+        for ix in range(kx0, kx1 + 1):
+            for iy in range(ky0, ky1 + 1):
+                bucket = self.cells.get((ix, iy))
+                if bucket:
+                    found.extend(bucket)
+        found.sort(key=lambda d: d.index)
+        return found
+
+
+def build_spatial_hash(dna_list, cell_size=CELL_SIZE):
+    grid = SpatialHash(cell_size)
+    for d in dna_list:
+        grid.insert(d)
+    return grid
+
+
+def create_dna(num_junk, num_virus, rng, config=DEFAULT_CONFIG):
+    dna_list = []
+    r, width, height = config.dna_radius, config.width, config.height
+
+    virus_dwell_times = config.samplers()[1].draw(rng, num_virus)
+    virus_idx = 0
+
+    # junk DNA
+    for _ in range(num_junk):
+        x = rng.uniform(r, width - r)
+        y = rng.uniform(r, height - r)
+        dna_list.append(DNA(x, y, r, "junk", rng, config))
+
+    # virus DNA
+    for _ in range(num_virus):
+        x = rng.uniform(r, width - r)
+        y = rng.uniform(r, height - r)
+        d = DNA(x, y, r, "virus", rng, config)
+        d.virus_bind_time = virus_dwell_times[virus_idx]
+        virus_idx += 1
+        dna_list.append(d)
+
+    for i, d in enumerate(dna_list):
+        d.index = i
+
+    return dna_list
+
+
+def create_cas9(num_cas9, rng, config=DEFAULT_CONFIG):
+    lst = []
+    r, width, height = config.cas9_radius, config.width, config.height
+    for _ in range(num_cas9):
+        x = rng.uniform(r, width - r)
+        y = rng.uniform(r, height - r)
+        lst.append(Cas9(x, y, r, rng, config))
+    return lst
+
+
+# --------------------
+# EVENT QUEUE
+# --------------------
+class EventQueue:
+    """
+    Min-heap of (time, seq, obj). An event is due on the first tick with
+    sim_time >= time, the same test the per-tick checks used to make.
+    seq keeps events with equal times in the order they were pushed.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.seq = 0
+
+    def push(self, t, obj):
+        heapq.heappush(self.heap, (t, self.seq, obj))
+        self.seq += 1
+
+    def next_time(self):
+        return self.heap[0][0] if self.heap else math.inf
+
+    def pop_due(self, now):
+        while self.heap and self.heap[0][0] <= now:
+            yield heapq.heappop(self.heap)[2]
+
+
+# --------------------
+# PROFILING (opt-in)
+# --------------------
+# wall-time phases of one tick; "render" is only used by the GUI
+PHASES = ("dna_move", "cas9_move", "events", "collisions", "prune", "render")
+COUNTERS = ("ticks", "fast_forward_ticks", "distance_checks", "binds", "kills")
+
+
+class PhaseProfiler:
+    """
+    Wall time per tick phase plus hot-path counters (ticks, distance
+    checks, binds, kills) of one run. Attach it to a Simulation to turn
+    profiling on; summary() is the JSON-ready result.
+    """
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.counts = Counter(dict.fromkeys(COUNTERS, 0))
+
+    def time(self, phase, fn):
+        """Call fn(), add its wall time to phase and return its result."""
+        t0 = time.perf_counter()
+        result = fn()
+        self.seconds[phase] += time.perf_counter() - t0
+        return result
+
+    def summary(self):
+        ticks = self.counts["ticks"]
+        return {
+            "seconds": {p: round(s, 6) for p, s in self.seconds.items()},
+            "ms_per_tick": {p: round(1000 * s / ticks, 4) if ticks else 0.0
+                            for p, s in self.seconds.items()},
+            "total_seconds": round(sum(self.seconds.values()), 6),
+            "counts": dict(self.counts),
+        }
+
+
+# --------------------
+# POPULATION RECORDING (opt-in)
+# --------------------
+# columns of PopulationRecorder.counts
+POPULATION_FIELDS = ("virus", "junk", "free_cas9", "junk_bound", "virus_bound")
+
+
+class PopulationRecorder:
+    """
+    Population counts (POPULATION_FIELDS) every `interval` seconds of sim
+    time from 0 to `duration`, in one (samples, fields) int32 array that
+    is allocated up front, so recording adds nothing per tick except one
+    time comparison. Attach it to a Simulation (or pass it to the numba
+    engine); row k is the state after the first tick ending at or past
+    times[k].
+    """
+
+    def __init__(self, interval, duration):
+        if np is None:
+            raise ImportError("PopulationRecorder needs numpy")
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        n = int(duration / interval + 1e-9) + 1
+        self.interval = interval
+        self.times = np.arange(n) * interval
+        self.counts = np.zeros((n, len(POPULATION_FIELDS)), dtype=np.int32)
+        self.filled = 0
+        self.next_time = 0.0
+
+    def sample(self, sim):
+        """Write the current counts into every row due by sim.sim_time."""
+        n = len(self.times)
+        if self.filled < n:
+            row = sim.population()
+            while self.filled < n and self.times[self.filled] <= sim.sim_time + 1e-9:
+                self.counts[self.filled] = row
+                self.filled += 1
+        self.next_time = self.times[self.filled] - 1e-9 if self.filled < n else math.inf
+
+    def finish(self, sim):
+        """
+        Carry the current counts to the end. run() calls this when it stops
+        early: exact when every Cas9 is parked past the end or gone, and
+        for free / bound Cas9 only an approximation once the virus is out.
+        """
+        self.counts[self.filled:] = sim.population()
+        self.filled = len(self.times)
+        self.next_time = math.inf
+
+
+# --------------------
+# SIMULATION
+# --------------------
+class SimObserver:
+    """
+    Base class for things that watch a Simulation (renderers, recorders).
+    Override only the hooks you need. Hooks fire once per event, never
+    once per particle per tick, and a Simulation with no observers makes
+    no calls at all.
+    """
+
+    def on_junk_check(self, sim, cas9, dna):
+        """cas9 just bound to a junk DNA at sim.sim_time."""
+
+    def on_capture(self, sim, cas9, dna):
+        """cas9 just cut virus dna; both are dead and leave the lists."""
+
+
+class Simulation:
+    """
+    One experiment: the DNA / Cas9 populations plus the rules that move
+    them, advanced one fixed tick (UPDATE_INTERVAL_MS unless dt is set)
+    at a time.
+
+    step() is one tick (the GUI calls it at its own pace), run(duration)
+    runs to the end with the headless shortcuts: stop once nothing can
+    change the kill count, and only walk the DNA while every Cas9 is bound.
+
+    Unbinds and cooldown ends sit in event queues and are applied on the
+    tick they come due, so nothing is re-checked per tick. A bound Cas9
+    is not moved while bound; it jumps to its DNA when released, so
+    anything drawing it should place it at cas9.bound_to.
+
+    config: SimConfig with the model parameters (DEFAULT_CONFIG if None).
+    speed (default config.cas9_speed) can be changed between ticks (GUI
+    slider). observers: iterable of SimObserver. profiler: optional
+    PhaseProfiler; without one step() takes no timestamps and keeps no
+    counters.
+
+    dt: tick length in seconds (default UPDATE_INTERVAL_MS). Speeds and
+    turn chances are per base tick, so a longer tick moves particles
+    proportionally further and turns them with the matching probability.
+    ccd: swept collisions, see collide_swept(); without it particles only
+    meet if they overlap at the end of a tick, and fast ones can pass
+    through each other once dt is raised. Free Cas9 then follow the path
+    of Cas9.swept_move() instead of one straight step, looked at on the
+    base tick grid along the way.
+
+    recorder: optional PopulationRecorder, filled at construction (t = 0)
+    and then on the ticks its samples come due.
+    """
+
+    def __init__(self, num_junk, num_virus, num_cas9, rng, speed=None, observers=(),
+                 profiler=None, dt=None, ccd=False, recorder=None, config=None):
+        self.config = cfg = config if config is not None else DEFAULT_CONFIG
+        self.rng = rng
+        self.speed = speed if speed is not None else cfg.cas9_speed
+        self.ccd = ccd
+        self.observers = list(observers)
+        self.profiler = profiler
+        self.num_junk = num_junk
+        self.num_virus = num_virus
+        self.num_cas9 = num_cas9
+
+        self.dna_list = create_dna(num_junk, num_virus, rng, cfg)
+        self.cas9_list = create_cas9(num_cas9, rng, cfg)
+        self.grid = build_spatial_hash(self.dna_list, cfg.contact_distance) if USE_SPATIAL_HASH else None
+
+        self.capture_count = 0  # number of virus kills
+        self.virus_left = num_virus
+        self.n_free = num_cas9
+
+        # unbind times of bound Cas9 and cooldown ends of DNA
+        self.unbind_events = EventQueue()
+        self.cooldown_events = EventQueue()
+
+        self.sim_time = 0.0
+        base_dt = UPDATE_INTERVAL_MS / 1000.0  # 0.02 s
+        self.dt = base_dt if dt is None else dt
+        self.step_scale = self.dt / base_dt
+        self.dna_turn = turn_prob(cfg.dna_turn_prob, self.step_scale)
+        self.cas9_turn = turn_prob(cfg.cas9_turn_prob, self.step_scale)
+
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.sample(self)
+
+    def kill_density(self):
+        """kills / initial_virus (0 when there was no virus)."""
+        if self.num_virus > 0:
+            return self.capture_count / self.num_virus
+        return 0.0
+
+    def finished(self):
+        """Nothing left that could change the kill count."""
+        return self.virus_left == 0 or not self.cas9_list
+
+    def population(self):
+        """(live virus, live junk, free Cas9, junk-bound Cas9, virus-bound Cas9)."""
+        virus_bound = sum(1 for c in self.cas9_list if c.state == "bound_virus")
+        return (self.virus_left, len(self.dna_list) - self.virus_left, self.n_free,
+                len(self.cas9_list) - self.n_free - virus_bound, virus_bound)
+
+    def step(self):
+        """Advance one tick (timed phase by phase if a profiler is attached)."""
+        prof = self.profiler
+        collide = self.collide_swept if self.ccd else self.collide
+        if prof is None:
+            self.move_dna()
+            self.move_cas9()
+            self.apply_events()
+            if collide():
+                self.prune()
+        else:
+            prof.time("dna_move", self.move_dna)
+            prof.time("cas9_move", self.move_cas9)
+            prof.time("events", self.apply_events)
+            if prof.time("collisions", collide):
+                prof.time("prune", self.prune)
+            prof.counts["ticks"] += 1
+
+        self.sim_time += self.dt
+        rec = self.recorder
+        if rec is not None and self.sim_time >= rec.next_time:
+            rec.sample(self)
+
+    def move_dna(self):
+        grid = self.grid
+        speed = self.speed * self.step_scale
+        p_turn = self.dna_turn
+        if self.ccd:
+            for d in self.dna_list:
+                d.px, d.py = d.x, d.y
+        for d in self.dna_list:
+            d.move_step(speed, p_turn)
+            if grid is not None:
+                grid.move(d)
+
+    def move_cas9(self):
+        # bound Cas9 are not touched, they jump to their DNA on unbind
+        speed = self.speed * self.step_scale
+        p_turn = self.cas9_turn
+        for c in self.cas9_list:
+            if c.state == "free":
+                if self.ccd:
+                    self.plan_path(c, self.sim_time, self.dt)
+                else:
+                    c.move_step(speed, p_turn)
+
+    def apply_events(self):
+        """Unbinds and cooldown ends that came due this tick."""
+        sim_time = self.sim_time
+        for c in self.unbind_events.pop_due(sim_time):
+            if self.ccd:
+                # swept ticks can release a Cas9 early (collide_swept), which
+                # leaves its original event behind
+                if c.state == "free" or c.bound_until > sim_time:
+                    continue
+                d = self.release_swept(c)
+            else:
+                d = c.release(sim_time)
+            self.n_free += 1
+            if d.cooldown_until > sim_time:
+                d.cooling = True
+                self.cooldown_events.push(d.cooldown_until, d)
+
+        for d in self.cooldown_events.pop_due(sim_time):
+            # a later cooldown may have replaced the one this event was for
+            if sim_time >= d.cooldown_until:
+                d.cooling = False
+
+    def release_swept(self, c):
+        """
+        Unbind for ccd runs, timed as on the base UPDATE_INTERVAL_MS grid:
+        at base dt the Cas9 would be free (and moving) from the base tick
+        after bound_until, so with longer ticks it makes up all the motion
+        since then (which can reach back into the previous tick) as one
+        catch-up path, and the DNA's cooldown starts at the base
+        release time. The Cas9 restarts from where its DNA was at that
+        time (interpolated along the DNA's move this tick).
+        """
+        base = UPDATE_INTERVAL_MS / 1000.0
+        end = self.sim_time + self.dt
+        released = math.ceil(c.bound_until / base - 1e-9) * base
+        d = c.release(min(released, end))
+        start = min(released + base, end)
+        f = min(max((start - self.sim_time) / self.dt, 0.0), 1.0)
+        c.x = d.px + (d.x - d.px) * f
+        c.y = d.py + (d.y - d.py) * f
+        self.plan_path(c, start, end - start, fresh=True)
+        return d
+
+    def plan_path(self, c, t0, duration, fresh=False):
+        """
+        Swept runs: plan free Cas9 c's path from time t0 and start its first
+        leg. fresh: c was just released, so its start still needs a look.
+        """
+        c.px, c.py, c.pt = c.x, c.y, t0
+        c.qt, c.qdir = t0, c.dir
+        c.path = []
+        c.fresh = fresh
+        if duration > 0:
+            base = UPDATE_INTERVAL_MS / 1000.0
+            legs = c.swept_move(self.speed, duration / base, self.config.cas9_turn_prob)
+            c.path = [(x, y, t0 + f * duration, h) for x, y, f, h in reversed(legs)]
+            c.dir = c.qdir
+            c.x, c.y, c.qt, c.qdir = c.path.pop()
+
+    def collide(self):
+        """Every free Cas9 takes the first eligible DNA it touches; True if anything died."""
+        grid = self.grid
+        buffer = self.config.collision_buffer
+        killed = False
+        checks = 0
+
+        for c in self.cas9_list:
+            if c.state != "free":
+                continue
+
+            candidates = grid.nearby(c.x, c.y) if grid is not None else self.dna_list
+            for d in candidates:
+                if not d.alive:
+                    continue
+
+                # global cooldown (junk or virus)
+                if d.cooling:
+                    continue
+
+                # virus already occupied by a failed-check Cas9
+                if d.kind == "virus" and d.bound:
+                    continue
+
+                checks += 1
+                if distance(c, d) <= (c.r + d.r + buffer):
+                    killed |= self.contact(c, d)
+                    # either way, this Cas9 is done with collisions this step
+                    break
+
+        if self.profiler is not None:
+            self.profiler.counts["distance_checks"] += checks
+        return killed
+
+    def collide_swept(self):
+        """
+        Long-tick version of collide(): every DNA moved in a straight line
+        from (px, py) to (x, y) this tick and every free Cas9 along the legs
+        of its planned path. They are looked at on the UPDATE_INTERVAL_MS
+        grid in between, where the base engine would look, and the contacts
+        of all Cas9 are taken in time order (list order breaks ties), so a
+        DNA one Cas9 binds late in the tick is still there for another
+        that reached it earlier. A junk bind that would already be over
+        before the tick ends is released on the spot and the Cas9's path
+        re-planned from there, so a long tick allows as many contacts as
+        the base ticks it stands for.
+        """
+        base = UPDATE_INTERVAL_MS / 1000.0
+        end = self.sim_time + self.dt
+        killed = False
+        pending = []
+
+        def look(i, c):
+            d, tick = self.next_contact(c)
+            if d is not None:
+                heapq.heappush(pending, (tick, i, d))
+
+        for i, c in enumerate(self.cas9_list):
+            if c.state == "free" and c.alive:
+                look(i, c)
+
+        while pending:
+            tick, i, d = heapq.heappop(pending)
+            c = self.cas9_list[i]
+            if not d.alive or d.cooling or (d.kind == "virus" and d.bound):
+                look(i, c)      # taken by an earlier contact, look further
+                continue
+            c.path = []
+            # stamped like the base engine stamps it: with the start of
+            # the UPDATE_INTERVAL_MS tick that moved c there
+            killed |= self.contact(c, d, (tick - 1) * base)
+            if c.state != "bound_junk":
+                continue
+            if math.ceil(c.bound_until / base - 1e-9) * base + base >= end:
+                continue        # still bound at the end of the tick
+            d = self.release_swept(c)
+            self.n_free += 1
+            d.cooling = True
+            self.cooldown_events.push(d.cooldown_until, d)
+            look(i, c)
+
+        return killed
+
+    def next_contact(self, c):
+        """
+        (dna, base tick) of free Cas9 c's next contact, walking it along
+        its path up to there; (None, None) if it reaches the end.
+        """
+        while True:
+            d, tick = self.first_contact(c)
+            if d is not None:
+                return d, tick
+            if not c.path:
+                c.dir = c.qdir
+                return None, None
+            # nothing on this leg, go on to the next one
+            c.px, c.py, c.pt, c.dir = c.x, c.y, c.qt, c.qdir
+            c.x, c.y, c.qt, c.qdir = c.path.pop()
+            c.fresh = False
+
+    def first_contact(self, c):
+        """
+        (dna, base tick) of the earliest eligible DNA that c overlaps at
+        one of the UPDATE_INTERVAL_MS ticks ending on its current leg (pt ->
+        qt, its start too if c.fresh); (None, None) if none. DNA positions
+        are interpolated over the same stretch of the tick. At a contact
+        c takes the heading it had there.
+        """
+        grid = self.grid
+        base = UPDATE_INTERVAL_MS / 1000.0
+        f0 = max((c.pt - self.sim_time) / self.dt, 0.0)
+        f1 = max((c.qt - self.sim_time) / self.dt, 0.0)
+        first = round(c.pt / base)
+        ticks = round(c.qt / base) - first
+        lo = 0 if c.fresh else 1
+        # DNA within contact distance of the Cas9's segment, padded by how
+        # far a DNA can move in one tick (0.3 x the Cas9 speed per axis)
+        cfg = self.config
+        pad = cfg.contact_distance + 0.3 * self.speed * self.step_scale
+        cvx, cvy = c.x - c.px, c.y - c.py
+        best, best_k = None, ticks + 1
+        checks = 0
+
+        if grid is not None:
+            candidates = grid.in_box(min(c.px, c.x) - pad, min(c.py, c.y) - pad,
+                                     max(c.px, c.x) + pad, max(c.py, c.y) + pad)
+        else:
+            candidates = self.dna_list
+        for d in candidates:
+            if not d.alive or d.cooling:
+                continue
+            if d.kind == "virus" and d.bound:
+                continue
+
+            checks += 1
+            mx, my = d.x - d.px, d.y - d.py
+            span = contact_span(c.px - (d.px + mx * f0), c.py - (d.py + my * f0),
+                                cvx - mx * (f1 - f0), cvy - my * (f1 - f0),
+                                c.r + d.r + cfg.collision_buffer)
+            if span is None:
+                continue
+            # the first base tick end on this leg inside the contact span
+            k = max(lo, math.ceil(span[0] * ticks - 1e-9))
+            if k < best_k and k <= span[1] * ticks + 1e-9:
+                best, best_k = d, k
+
+        if self.profiler is not None:
+            self.profiler.counts["distance_checks"] += checks
+        if best is None:
+            return None, None
+        if best_k == ticks:
+            c.dir = c.qdir
+        return best, first + best_k
+
+    def contact(self, c, d, now=None):
+        """
+        Free Cas9 c meets eligible DNA d: bind, or cut a virus. True on a
+        kill. now: time of the contact (swept only, else the tick's start).
+        """
+        sim_time = self.sim_time if now is None else now
+        cfg = self.config
+        prof = self.profiler
+        killed = False
+
+        if d.kind == "junk":
+            bind_time = d.junk_bind_time if d.junk_bind_time is not None else cfg.bind_time_junk
+            c.bind_to(d, sim_time, bind_time, "bound_junk")
+            self.unbind_events.push(c.bound_until, c)
+            if prof is not None:
+                prof.counts["binds"] += 1
+            for ob in self.observers:
+                ob.on_junk_check(self, c, d)
+
+        else:  # virus
+            p = self.rng.random()
+            if p <= cfg.success_prob:
+                # IMMEDIATE SUCCESS: no dwell, both disappear
+                self.capture_count += 1
+                self.virus_left -= 1
+                killed = True
+                d.alive = False
+                if self.grid is not None:
+                    self.grid.remove(d)
+                c.alive = False
+                if prof is not None:
+                    prof.counts["kills"] += 1
+                for ob in self.observers:
+                    ob.on_capture(self, c, d)
+            else:
+                # FAILED MATCH: dwell for virus_bind_time, then detach
+                d.bound = True
+                d.cooldown_until = sim_time + cfg.cooldown_virus_fail
+                d.cooling = True
+                self.cooldown_events.push(d.cooldown_until, d)
+                bind_time = ((d.virus_bind_time * cfg.time_scale) if d.virus_bind_time is not None
+                             else cfg.bind_time_virus)
+                c.bind_to(d, sim_time, bind_time, "bound_virus")
+                self.unbind_events.push(c.bound_until, c)
+                if prof is not None:
+                    prof.counts["binds"] += 1
+
+        self.n_free -= 1
+        return killed
+
+    def prune(self):
+        """Drop the dead from the particle lists."""
+        self.dna_list = [d for d in self.dna_list if d.alive]
+        self.cas9_list = [c for c in self.cas9_list if c.alive]
+
+    def run(self, duration):
+        """Step until sim_time reaches duration (or nothing can happen any more)."""
+        while self.sim_time < duration:
+            if self.finished():
+                break
+
+            # every Cas9 is parked: no collision can happen before the next
+            # unbind, so only the DNA random walk has to be advanced until then
+            if self.n_free == 0:
+                wake = self.unbind_events.next_time()
+                if wake >= duration:
+                    break
+                self.fast_forward(wake)
+                if self.sim_time >= duration:
+                    break
+                # the tick the unbind is due on runs normally below
+
+            self.step()
+
+        if self.recorder is not None and self.sim_time < duration:
+            self.recorder.finish(self)      # stopped early: carry the last state on
+        return self.kill_density()
+
+    def fast_forward(self, until):
+        """DNA-only ticks up to `until` (the grid catches up on the next step)."""
+        prof = self.profiler
+        t0 = time.perf_counter() if prof is not None else 0.0
+        ticks = 0
+        speed = self.speed * self.step_scale
+        while self.sim_time < until:
+            for d in self.dna_list:
+                d.move_step(speed, self.dna_turn)
+            self.sim_time += self.dt
+            ticks += 1
+        if self.recorder is not None:
+            self.recorder.sample(self)      # nothing but the DNA moved meanwhile
+        if prof is not None:
+            prof.seconds["dna_move"] += time.perf_counter() - t0
+            prof.counts["ticks"] += ticks
+            prof.counts["fast_forward_ticks"] += ticks
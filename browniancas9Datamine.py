@@ -3,410 +3,2532 @@
 # Maxwell Hadaway, Kenechukwu Aniedobe, Michael Olatunji
 # Batch simulation version (no GUI) for parameter sweeps
 
+import argparse
+import glob
+import hashlib
+import heapq
+import importlib.util
+import json
+import os
+import secrets
 import random
 import math
+import sqlite3
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:       # numpy is only needed for engine="numpy"
+    np = None
+
+# numba is only needed for engine="numba" and is imported on first use
+# (_nb_compiled), it costs more than the rest of the module to import
+HAVE_NUMBA = importlib.util.find_spec("numba") is not None
+
+# model, particles and the tick loop live in the shared headless core
+from browniancas9Core import (
+    DIRECTIONS, UPDATE_INTERVAL_MS, JUNK_PROBS, POPULATION_FIELDS,
+    DEFAULT_CONFIG, PhaseProfiler, PopulationRecorder, SimConfig, Simulation,
+)
 
 # --------------------
 # CONFIG
 # --------------------
-WIDTH, HEIGHT = 1000, 1000
+EXPERIMENT_DURATION = 10.0    # <<< changed from 20.0 to 10.0 s
 
-TIME_SCALE = 0.2
+# output file for MATLAB
+OUTPUT_FILE = "batch_results.txt"
 
-DNA_RADIUS = 10
-CAS9_RADIUS = 20
+# append-only checkpoint log; the output files are rebuilt from it on resume
+LOG_FILE = "batch_results.log"
 
-DIRECTIONS = [
-    (0, -1), (0, 1), (-1, 0), (1, 0),
-    (-1, -1), (1, -1), (-1, 1), (1, 1)
-]
+# output formats (see OUTPUT WRITERS); tsv is the file the .mlx script reads
+OUTPUT_FORMATS = ("tsv", "npz", "npy", "mat")
 
-UPDATE_INTERVAL_MS = 20       # used as fixed dt = 0.02 s
-BIND_TIME_JUNK = 1.0          # fallback, junk uses its own sampled time
-BIND_TIME_VIRUS = 2.0         # fallback, virus uses its own sampled time
+# how many times a parallel sweep rebuilds its process pool after a
+# worker dies before giving up
+MAX_POOL_RESTARTS = 3
 
-COOLDOWN_JUNK = 2.5
-COOLDOWN_VIRUS_FAIL = 2.5     # virus ignore time after failed check
+# replicates per grid point
+CI_Z = 1.96               # normal quantile for the 95 % CI columns and stopping rule
+MIN_REPLICATES = 5        # adaptive mode never stops before this many ...
+MAX_REPLICATES = 200      # ... and never runs more than this many
 
-EXPERIMENT_DURATION = 10.0    # <<< changed from 20.0 to 10.0 s
+# --------------------
+# RNG STREAMS
+# --------------------
+def task_seed(master_seed, *key):
+    """
+    Seed of one task (key = junk, cv, replicate), derived from the master
+    seed the way SeedSequence.spawn derives children, but addressed by the
+    key instead of by spawn order. Any single task can be re-run on its
+    own and gets the same stream, whatever ran before it or in parallel.
+    Falls back to a string seed for random.Random when numpy is missing.
+    """
+    if np is None:
+        return ":".join(str(k) for k in (master_seed,) + key)
+    return np.random.SeedSequence(master_seed, spawn_key=key)
 
-COLLISION_BUFFER = 0.0
 
-# success probability: P(immediate cut when Cas9 hits a virus)
-SUCCESS_PROB = 0.8
+def python_rng(seed=None):
+    """random.Random for the object engine from an int, str or SeedSequence."""
+    if np is not None and isinstance(seed, np.random.SeedSequence):
+        seed = int.from_bytes(seed.generate_state(4).tobytes(), "little")
+    return random.Random(seed)
 
-# Scale virus dwell times so they don't exceed ~12 s
-VIRUS_TIME_SCALE = 0.27   # 0.27 * 43.7 ≈ 11.8 s max for strongest bind
 
-# fixed Cas9 speed (same as GUI default)
-CAS9_SPEED = 20
+# --------------------
+# SINGLE SIMULATION
+# --------------------
+ENGINES = ("python", "numpy", "numba", "ssa")
+
+
+def run_single_sim(num_junk, num_virus, num_cas9, engine="python", seed=None, profiler=None,
+                   duration=EXPERIMENT_DURATION, dt=None, ccd=False, recorder=None, cache=None,
+                   config=None):
+    """
+    Run one 10 s simulation (or `duration` seconds) and return:
+      - virus_kill_density = kills / initial_virus
+
+    engine = "python" steps the DNA / Cas9 objects one at a time,
+    engine = "numpy" uses the vectorized struct-of-arrays engine below,
+    engine = "numba" the compiled flat-array engine (the python engine
+    when numba is not installed), engine = "ssa" the well-mixed
+    Gillespie model (no positions, see WellMixedSim).
+    seed: int, str or SeedSequence (see task_seed); None = fresh entropy.
+    All randomness comes from a generator built from it, never from the
+    global random module.
+    profiler: optional PhaseProfiler that collects per-phase wall times
+    and counters for this run (the numpy engine only counts ticks and kills).
+    dt, ccd: tick length and swept collisions, see Simulation (python
+    engine only; the array engines always step at the base dt).
+    recorder: optional PopulationRecorder that samples the population
+    counts along the run (python, numba and ssa engines).
+    cache: optional ResultCache. A seeded run that is already in it is
+    returned (and its recorder filled) without simulating anything.
+    config: SimConfig with the model parameters (DEFAULT_CONFIG if None).
+    """
+    if engine == "numba" and not HAVE_NUMBA:
+        engine = "python"
+    if engine in ("numpy", "numba", "ssa") and (dt is not None or ccd):
+        raise ValueError("dt / ccd are only supported by the python engine")
+    if engine == "numpy" and recorder is not None:
+        raise ValueError("the numpy engine can't record population counts")
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {ENGINES}")
+
+    if config is None:
+        config = DEFAULT_CONFIG
+    key = None
+    if cache is not None and seed is not None:
+        key = cache_key(num_junk, num_virus, num_cas9, engine, seed, duration, dt, ccd, recorder,
+                        config)
+        density = cache.get(key, recorder)
+        if density is not None:
+            return density
+
+    if engine == "numpy":
+        density = run_single_sim_numpy(num_junk, num_virus, num_cas9, seed=seed,
+                                       profiler=profiler, duration=duration, config=config)
+    elif engine == "ssa":
+        density = run_single_sim_ssa(num_junk, num_virus, num_cas9, seed=seed, profiler=profiler,
+                                     duration=duration, recorder=recorder, config=config)
+    elif engine == "numba":
+        density = run_single_sim_numba(num_junk, num_virus, num_cas9, seed=seed,
+                                       profiler=profiler, duration=duration, recorder=recorder,
+                                       config=config)
+    else:
+        sim = Simulation(num_junk, num_virus, num_cas9, python_rng(seed), profiler=profiler,
+                         dt=dt, ccd=ccd, recorder=recorder, config=config)
+        density = sim.run(duration)
+
+    if key is not None:
+        cache.put(key, density, recorder)
+    return density
 
-# output file for MATLAB
-OUTPUT_FILE = "batch_results.txt"
 
 # --------------------
-# JUNK DNA MISMATCH DISTRIBUTION
+# NUMPY ENGINE (struct of arrays, batched over replicates)
 # --------------------
-JUNK_DISTANCES = list(range(1, 11))   # 1..10
+# Cas9 states, same meaning as Cas9.state in the object engine
+FREE, BOUND_JUNK, BOUND_VIRUS = 0, 1, 2
+
+# cap on the (free Cas9, nearby DNA) candidate pairs tested per chunk
+ENSEMBLE_CHUNK_ELEMENTS = 4_000_000
 
-_raw_p = [0.75 * (0.25 ** (n - 1)) for n in JUNK_DISTANCES]
-_raw_sum = sum(_raw_p)
-JUNK_PROBS = [v / _raw_sum for v in _raw_p]
 
+def _per_replicate(rngs, draw):
+    """Stack one draw from each replicate's own generator -> leading R axis."""
+    return np.stack([draw(g) for g in rngs])
 
-def sample_junk_bind_time():
+
+def _reflect_walls(pos, dirs, mask, r, cfg):
     """
-    Sample a mismatch 'distance' n from {1..10} with P(n),
-    then compute t_bound = 0.0026 * exp(0.9729 * n).
-    (Your first MATLAB model for junk DNA.)
+    Vectorized version of the wall block in DNA/Cas9.move_step:
+    clamp to the box and flip the direction component that hit a wall.
+    Only rows in mask (the particles that just moved) are touched.
     """
-    n = random.choices(JUNK_DISTANCES, weights=JUNK_PROBS, k=1)[0]
-    t_bound = 0.0026 * math.exp(0.9729 * n)
-    return t_bound
+    for axis, limit in ((0, cfg.width), (1, cfg.height)):
+        low = mask & (pos[..., axis] - r < 0)
+        high = mask & (pos[..., axis] + r > limit)
+        pos[low, axis] = r
+        pos[high, axis] = limit - r
+        dirs[low | high, axis] *= -1
+
+
+def _resample_dirs(u, dirs, mask, p_change, directions):
+    """
+    With probability p_change pick a fresh direction from DIRECTIONS.
+    One uniform u per particle does both: change if u < p_change, and
+    then u / p_change is again uniform, so it also picks the direction.
+    """
+    change = mask & (u < p_change)
+    if change.any():
+        pick = (u[change] / p_change * len(directions)).astype(np.intp)
+        dirs[change] = directions[pick]
+
+
+def _contact_pairs(points, point_rep, dna_pos, eligible, cfg):
+    """
+    Broad phase of the ensemble collisions, SpatialHash as arrays: the
+    eligible DNA are sorted into cells of side contact_distance (per
+    replicate), and each point (a free Cas9 at points[i] in replicate
+    point_rep[i]) is only tested against the DNA in its 3x3 block of
+    cells. Returns (first, starts, hits): first[i] the lowest touching DNA
+    index of point i (the one the object loop's `break` takes, -1 if
+    none) and hits[starts[i]:starts[i + 1]] all the DNA it touches, in no
+    particular order.
+    """
+    cell = cfg.contact_distance
+    nx, ny = int(cfg.width // cell) + 1, int(cfg.height // cell) + 1
+    er, ed = np.nonzero(eligible)                     # by replicate, then DNA index
+    x, y = dna_pos[er, ed, 0], dna_pos[er, ed, 1]
+    keys = (er * nx + np.clip((x // cell).astype(np.intp), 0, nx - 1)) * ny \
+        + np.clip((y // cell).astype(np.intp), 0, ny - 1)
+    order = np.argsort(keys, kind="stable")
+    keys, dna_sorted, x, y = keys[order], ed[order], x[order], y[order]
+
+    px = np.clip((points[:, 0] // cell).astype(np.intp), 0, nx - 1)
+    py = np.clip((points[:, 1] // cell).astype(np.intp), 0, ny - 1)
+    lo, hi = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            qx, qy = px + dx, py + dy
+            key = (point_rep * nx + qx) * ny + qy
+            a = np.searchsorted(keys, key, "left")
+            b = np.searchsorted(keys, key, "right")
+            outside = (qx < 0) | (qx >= nx) | (qy < 0) | (qy >= ny)
+            b[outside] = a[outside]
+            lo.append(a)
+            hi.append(b)
+    lo, hi = np.stack(lo, axis=1), np.stack(hi, axis=1)
+    per_point = (hi - lo).sum(axis=1)
+
+    first = np.full(len(points), -1, dtype=np.intp)
+    counts, hits = [], []
+    r2 = cell * cell
+    chunk_ends = np.cumsum(per_point)
+    start = 0
+    while start < len(points):
+        # whole points per chunk, about ENSEMBLE_CHUNK_ELEMENTS pairs each
+        base = chunk_ends[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(chunk_ends, base + ENSEMBLE_CHUNK_ELEMENTS, "right")))
+        n = (hi[start:stop] - lo[start:stop]).ravel()
+        total = int(n.sum())
+        if total:
+            offset = np.cumsum(n) - n
+            at = np.repeat(lo[start:stop].ravel() - offset, n) + np.arange(total)
+            near = per_point[start:stop]
+            dx = np.repeat(points[start:stop, 0], near) - x[at]
+            dy = np.repeat(points[start:stop, 1], near) - y[at]
+            touching = dx * dx + dy * dy <= r2
+            row = np.repeat(np.arange(stop - start), near)[touching]
+            dna = dna_sorted[at[touching]]
+            # the pairs are grouped by point, so each group's minimum is its first DNA
+            n_hit = np.bincount(row, minlength=stop - start)
+            has = n_hit > 0
+            if has.any():
+                first[start:stop][has] = np.minimum.reduceat(dna, (np.cumsum(n_hit) - n_hit)[has])
+            counts.append(n_hit)
+            hits.append(dna)
+        else:
+            counts.append(np.zeros(stop - start, dtype=np.intp))
+        start = stop
+    starts = np.zeros(len(points) + 1, dtype=np.intp)
+    if counts:
+        np.cumsum(np.concatenate(counts), out=starts[1:])
+    hits = np.concatenate(hits) if hits else np.zeros(0, dtype=np.intp)
+    return first, starts, hits
+
+
+def _move_dna(u, dna_pos, dna_dir, mask, directions, cfg):
+    """DNA.move_step for every DNA in mask: speed * 0.3, dna_turn_prob direction change."""
+    dna_pos[mask] += dna_dir[mask] * (cfg.cas9_speed * 0.3)
+    _reflect_walls(dna_pos, dna_dir, mask, cfg.dna_radius, cfg)
+    _resample_dirs(u, dna_dir, mask, cfg.dna_turn_prob, directions)
+
+
+def run_single_sim_numpy(num_junk, num_virus, num_cas9, seed=None, profiler=None,
+                         duration=EXPERIMENT_DURATION, config=None):
+    """run_single_sim on the array engine: an ensemble of one."""
+    return float(run_ensemble_numpy(num_junk, num_virus, num_cas9, 1, seeds=[seed],
+                                    profiler=profiler, duration=duration, config=config)[0])
+
+
+def run_ensemble_numpy(num_junk, num_virus, num_cas9, replicates, seeds=None, profiler=None,
+                       duration=EXPERIMENT_DURATION, config=None):
+    """
+    Run `replicates` independent simulations with the same populations
+    together. Every array has a leading replicate axis, so each tick is
+    one vectorized step for the whole ensemble:
+
+      1. DNA move (speed * 0.3, 10 % direction change by default)
+      2. bound Cas9 follow their DNA and unbind when bound_until is reached,
+         free Cas9 move (speed, 20 % direction change by default)
+      3. collisions: each free Cas9 takes the FIRST eligible DNA in list
+         order (junk first, then virus) that it touches, exactly like the
+         `break` in the object loop; _contact_pairs only tests the DNA in
+         the neighbouring cells, like the object engine's SpatialHash
+
+    Junk contacts never change what later Cas9s can see, so they are
+    resolved all at once. Virus contacts do (a kill or a failed check
+    takes the virus out), so the few Cas9s touching a virus are resolved
+    in Cas9 order against a running "taken" mask.
+
+    Each replicate draws from its own generator (seeds: one seed or
+    SeedSequence per replicate, fresh entropy if None) and keeps its own
+    kill count. Every tick takes the same fixed block of uniforms from
+    each stream, so a replicate's result does not depend on which other
+    replicates it was batched with. Returns an array of `replicates`
+    kill densities. profiler (optional PhaseProfiler) gets the tick and
+    kill counts; duration defaults to EXPERIMENT_DURATION, config (the
+    model parameters) to DEFAULT_CONFIG.
+    """
+    if np is None:
+        raise ImportError("the numpy engines need numpy installed")
+    cfg = config if config is not None else DEFAULT_CONFIG
+    junk_sampler, virus_sampler = cfg.samplers()
+
+    R = replicates
+    if seeds is None:
+        seeds = np.random.SeedSequence().spawn(R)
+    rngs = [np.random.default_rng(s) for s in seeds]
+
+    directions = np.array(DIRECTIONS, dtype=float)
+    n_dir = len(directions)
+    n_dna = num_junk + num_virus
+
+    # ---- DNA arrays (junk first, then virus, same order as create_dna) ----
+    dna_pos = _per_replicate(rngs, lambda g: g.uniform(
+        cfg.dna_radius, [cfg.width - cfg.dna_radius, cfg.height - cfg.dna_radius], size=(n_dna, 2)))
+    dna_dir = directions[_per_replicate(rngs, lambda g: g.integers(0, n_dir, n_dna))]
+    dna_is_virus = np.zeros(n_dna, dtype=bool)        # same for every replicate
+    dna_is_virus[num_junk:] = True
+    dna_alive = np.ones((R, n_dna), dtype=bool)
+    dna_bound = np.zeros((R, n_dna), dtype=bool)      # virus held by a failed check
+    dna_cooldown_until = np.zeros((R, n_dna))
+
+    # per-DNA dwell time (junk: sampled junk time, virus: scaled virus time)
+    dna_bind_time = np.concatenate([
+        _per_replicate(rngs, lambda g: junk_sampler.draw(g, num_junk)),
+        _per_replicate(rngs, lambda g: virus_sampler.draw(g, num_virus)) * cfg.time_scale,
+    ], axis=1)
+
+    # ---- Cas9 arrays ----
+    cas9_pos = _per_replicate(rngs, lambda g: g.uniform(
+        cfg.cas9_radius, [cfg.width - cfg.cas9_radius, cfg.height - cfg.cas9_radius], size=(num_cas9, 2)))
+    cas9_dir = directions[_per_replicate(rngs, lambda g: g.integers(0, n_dir, num_cas9))]
+    cas9_state = np.full((R, num_cas9), FREE, dtype=np.int8)
+    cas9_bound_to = np.zeros((R, num_cas9), dtype=np.intp)
+    cas9_bound_until = np.zeros((R, num_cas9))
+    cas9_alive = np.ones((R, num_cas9), dtype=bool)
+
+    capture_count = np.zeros(R, dtype=np.int64)
+
+    sim_time = 0.0
+    dt = UPDATE_INTERVAL_MS / 1000.0  # 0.02 s
+
+    def tick_uniforms():
+        # direction-change draws for one tick: DNA columns, then Cas9 columns
+        u = _per_replicate(rngs, lambda g: g.random(n_dna + num_cas9))
+        return u[:, :n_dna], u[:, n_dna:]
+
+    while sim_time < duration:
+        # replicates with nothing left that could change their kill count
+        # are frozen; stop when that is all of them
+        active = (capture_count < num_virus) & cas9_alive.any(axis=1)
+        if not active.any():
+            break
+        dna_moving = dna_alive & active[:, None]
+
+        # every Cas9 is parked: only the DNA walk matters until the next unbind
+        if not (cas9_alive & (cas9_state == FREE) & active[:, None]).any():
+            wake = cas9_bound_until[cas9_alive & active[:, None]].min()
+            if wake >= duration:
+                break
+            while sim_time < wake:
+                u_dna, _ = tick_uniforms()
+                _move_dna(u_dna, dna_pos, dna_dir, dna_moving, directions, cfg)
+                sim_time += dt
+                if profiler is not None:
+                    profiler.counts["ticks"] += 1
+                    profiler.counts["fast_forward_ticks"] += 1
+            if sim_time >= duration:
+                break
+
+        # ---- DNA movement ----
+        u_dna, u_cas9 = tick_uniforms()
+        _move_dna(u_dna, dna_pos, dna_dir, dna_moving, directions, cfg)
+
+        # ---- Cas9 movement ----
+        bound = cas9_alive & (cas9_state != FREE)
+        if bound.any():
+            # follow the DNA (bound DNA is never dead: junk can't die and
+            # a virus held by a failed check can't be hit)
+            ri, ci = np.nonzero(bound)
+            cas9_pos[ri, ci] = dna_pos[ri, cas9_bound_to[ri, ci]]
+
+            release = bound & (sim_time >= cas9_bound_until)
+            if release.any():
+                rel_junk = release & (cas9_state == BOUND_JUNK)
+                rel_virus = release & (cas9_state == BOUND_VIRUS)
+                ri, ci = np.nonzero(rel_junk)
+                dna_cooldown_until[ri, cas9_bound_to[ri, ci]] = sim_time + cfg.cooldown_junk
+                ri, ci = np.nonzero(rel_virus)
+                dna_bound[ri, cas9_bound_to[ri, ci]] = False
+                cas9_state[release] = FREE
+
+        # bound (and just-released) Cas9 do not move this tick
+        moving = cas9_alive & (cas9_state == FREE) & ~bound & active[:, None]
+        cas9_pos[moving] += cas9_dir[moving] * cfg.cas9_speed
+        _reflect_walls(cas9_pos, cas9_dir, moving, cfg.cas9_radius, cfg)
+        _resample_dirs(u_cas9, cas9_dir, moving, cfg.cas9_turn_prob, directions)
+
+        # ---- collisions ----
+        free = cas9_alive & (cas9_state == FREE) & active[:, None]
+        eligible = dna_alive & (sim_time >= dna_cooldown_until) & ~(dna_is_virus & dna_bound)
+
+        # one row per free Cas9 of any replicate, in (replicate, Cas9)
+        # order, tested against the nearby DNA of its own replicate
+        ri, ci = np.nonzero(free)
+        first, starts, hits = _contact_pairs(cas9_pos[ri, ci], ri, dna_pos, eligible, cfg)
+        hit_any = first >= 0
+        virus_first = hit_any & dna_is_virus[first]
+
+        # junk first hits: independent of every other Cas9
+        jk = hit_any & ~virus_first
+        r_, c_, d_ = ri[jk], ci[jk], first[jk]
+        cas9_state[r_, c_] = BOUND_JUNK
+        cas9_bound_to[r_, c_] = d_
+        cas9_bound_until[r_, c_] = sim_time + dna_bind_time[r_, d_]
+        cas9_pos[r_, c_] = dna_pos[r_, d_]
+
+        # virus first hits: resolve in Cas9 order, a virus that is
+        # killed or held drops out of `eligible` for the later rows
+        for k in np.flatnonzero(virus_first):
+            r, c = ri[k], ci[k]
+            mine = np.sort(hits[starts[k]:starts[k + 1]])
+            mine = mine[eligible[r, mine]]
+            if not len(mine):
+                continue
+            d = mine[0]
+            eligible[r, d] = False
+
+            if rngs[r].random() <= cfg.success_prob:
+                # IMMEDIATE SUCCESS: no dwell, both disappear
+                capture_count[r] += 1
+                dna_alive[r, d] = False
+                cas9_alive[r, c] = False
+            else:
+                # FAILED MATCH: dwell for the virus time, then detach
+                dna_bound[r, d] = True
+                dna_cooldown_until[r, d] = sim_time + cfg.cooldown_virus_fail
+                cas9_state[r, c] = BOUND_VIRUS
+                cas9_bound_to[r, c] = d
+                cas9_bound_until[r, c] = sim_time + dna_bind_time[r, d]
+                cas9_pos[r, c] = dna_pos[r, d]
+
+        sim_time += dt
+        if profiler is not None:
+            profiler.counts["ticks"] += 1
+
+    if profiler is not None:
+        profiler.counts["kills"] += int(capture_count.sum())
+    if num_virus > 0:
+        return capture_count / num_virus
+    return np.zeros(R)
 
 
 # --------------------
-# VIRUS MISMATCH / BIND-TIME MODEL (from your MATLAB code)
+# NUMBA ENGINE (compiled loops over flat arrays)
 # --------------------
-def generate_virus_dwell_times(n):
+# The same tick as Simulation.step(), written as plain loops over flat
+# arrays so numba can compile it: wall reflection, direction changes and
+# the first-contact search are all branches, which vectorize badly but
+# compile well. The kernels are ordinary Python until _nb_compiled()
+# wraps them in numba.njit on first use; cache=True keeps the machine
+# code in __pycache__, so only the first run on a machine pays for the
+# compile, not every pool worker.
+
+def _nb_move(pos, dirs, i, step, r, p_turn, directions, width, height):
+    """DNA/Cas9.move_step for row i: step, clamp to the box, maybe turn."""
+    for axis, limit in ((0, width), (1, height)):
+        v = pos[i, axis] + dirs[i, axis] * step
+        if v - r < 0:
+            v = r
+            dirs[i, axis] = -dirs[i, axis]
+        elif v + r > limit:
+            v = limit - r
+            dirs[i, axis] = -dirs[i, axis]
+        pos[i, axis] = v
+
+    if np.random.random() < p_turn:
+        k = np.random.randint(0, len(directions))
+        dirs[i, 0] = directions[k, 0]
+        dirs[i, 1] = directions[k, 1]
+
+
+def _nb_record(rec, filled, sim_time, interval, num_junk, virus_left, cas9_alive, cas9_state):
+    """PopulationRecorder.sample: fill the rows of rec due by sim_time, return the new fill."""
+    if filled >= rec.shape[0] or sim_time < filled * interval - 1e-9:
+        return filled
+    free = junk_bound = virus_bound = 0
+    for c in range(cas9_state.shape[0]):
+        if cas9_alive[c]:
+            if cas9_state[c] == FREE:
+                free += 1
+            elif cas9_state[c] == BOUND_JUNK:
+                junk_bound += 1
+            else:
+                virus_bound += 1
+    while filled < rec.shape[0] and filled * interval <= sim_time + 1e-9:
+        rec[filled, 0] = virus_left
+        rec[filled, 1] = num_junk
+        rec[filled, 2] = free
+        rec[filled, 3] = junk_bound
+        rec[filled, 4] = virus_bound
+        filled += 1
+    return filled
+
+
+def _nb_run(seed, num_junk, dna_pos, dna_dir, dna_bind_time, cas9_pos, cas9_dir,
+            directions, duration, rec, rec_interval, params):
+    """
+    Run one simulation in place on the starting arrays (DNA junk first,
+    then virus, as in create_dna). Returns (kills, ticks).
+    rec: (samples, POPULATION_FIELDS) counts filled every rec_interval
+    seconds like PopulationRecorder (zero rows = no recording).
+    params: the SimConfig values as a float tuple, see _nb_params().
+
+    Collisions use a cell list rebuilt every tick with a counting sort,
+    so each cell holds its DNA in index order and the lowest touching
+    index wins, like the sorted SpatialHash.nearby() in collide().
     """
-    MATLAB logic:
+    np.random.seed(seed)
+    n_dna = dna_pos.shape[0]
+    n_cas9 = cas9_pos.shape[0]
+    num_virus = n_dna - num_junk
+    (width, height, dna_r, cas9_r, contact_r, speed, dna_turn, cas9_turn,
+     cooldown_junk, cooldown_virus_fail, success_prob) = params
+    dt = UPDATE_INTERVAL_MS / 1000.0
+
+    dna_alive = np.ones(n_dna, dtype=np.bool_)
+    dna_bound = np.zeros(n_dna, dtype=np.bool_)       # virus held by a failed check
+    dna_cooldown_until = np.zeros(n_dna)
+    cas9_state = np.zeros(n_cas9, dtype=np.int8)      # FREE / BOUND_JUNK / BOUND_VIRUS
+    cas9_bound_to = np.zeros(n_cas9, dtype=np.int64)
+    cas9_bound_until = np.zeros(n_cas9)
+    cas9_alive = np.ones(n_cas9, dtype=np.bool_)
+
+    nx = int(width // contact_r) + 1
+    ny = int(height // contact_r) + 1
+    cell_start = np.zeros(nx * ny + 1, dtype=np.int64)
+    cell_fill = np.zeros(nx * ny, dtype=np.int64)
+    cell_items = np.zeros(n_dna, dtype=np.int64)
+    dna_cell = np.zeros(n_dna, dtype=np.int64)
+
+    kills = 0
+    cas9_left = n_cas9
+    sim_time = 0.0
+    ticks = 0
+    filled = _nb_record(rec, 0, sim_time, rec_interval, num_junk, num_virus, cas9_alive, cas9_state)
+    while sim_time < duration:
+        if kills == num_virus or cas9_left == 0:
+            break
+
+        # every Cas9 is parked until after the end: nothing can change
+        n_free = 0
+        wake = np.inf
+        for c in range(n_cas9):
+            if cas9_alive[c]:
+                if cas9_state[c] == FREE:
+                    n_free += 1
+                elif cas9_bound_until[c] < wake:
+                    wake = cas9_bound_until[c]
+        if n_free == 0 and wake >= duration:
+            break
+
+        # ---- movement ----
+        for i in range(n_dna):
+            if dna_alive[i]:
+                _nb_move(dna_pos, dna_dir, i, speed * 0.3, dna_r, dna_turn, directions, width, height)
+        for c in range(n_cas9):
+            if cas9_alive[c] and cas9_state[c] == FREE:
+                _nb_move(cas9_pos, cas9_dir, c, speed, cas9_r, cas9_turn, directions, width, height)
+
+        # ---- unbinds that came due ----
+        for c in range(n_cas9):
+            if cas9_alive[c] and cas9_state[c] != FREE and cas9_bound_until[c] <= sim_time:
+                d = cas9_bound_to[c]
+                cas9_pos[c, 0] = dna_pos[d, 0]
+                cas9_pos[c, 1] = dna_pos[d, 1]
+                if cas9_state[c] == BOUND_JUNK:
+                    dna_cooldown_until[d] = sim_time + cooldown_junk
+                else:
+                    dna_bound[d] = False
+                cas9_state[c] = FREE
+
+        # ---- cell list of the live DNA ----
+        cell_start[:] = 0
+        for i in range(n_dna):
+            if dna_alive[i]:
+                k = int(dna_pos[i, 0] // contact_r) * ny + int(dna_pos[i, 1] // contact_r)
+                dna_cell[i] = k
+                cell_start[k + 1] += 1
+        for k in range(nx * ny):
+            cell_start[k + 1] += cell_start[k]
+            cell_fill[k] = cell_start[k]
+        for i in range(n_dna):
+            if dna_alive[i]:
+                k = dna_cell[i]
+                cell_items[cell_fill[k]] = i
+                cell_fill[k] += 1
+
+        # ---- collisions ----
+        for c in range(n_cas9):
+            if not cas9_alive[c] or cas9_state[c] != FREE:
+                continue
+            cx = int(cas9_pos[c, 0] // contact_r)
+            cy = int(cas9_pos[c, 1] // contact_r)
+            best = -1
+            for ix in range(max(cx - 1, 0), min(cx + 2, nx)):
+                for iy in range(max(cy - 1, 0), min(cy + 2, ny)):
+                    k = ix * ny + iy
+                    for j in range(cell_start[k], cell_start[k + 1]):
+                        d = cell_items[j]
+                        if best >= 0 and d > best:
+                            break
+                        if not dna_alive[d] or sim_time < dna_cooldown_until[d]:
+                            continue
+                        if d >= num_junk and dna_bound[d]:
+                            continue
+                        dx = cas9_pos[c, 0] - dna_pos[d, 0]
+                        dy = cas9_pos[c, 1] - dna_pos[d, 1]
+                        if np.sqrt(dx * dx + dy * dy) <= contact_r:
+                            best = d
+                            break
+            if best < 0:
+                continue
 
-      x = 1:10;
-      p = 0.75 * 0.25^(x-1); p = p / sum(p);
-      distance = randsample(x, ..., p);
-      distance' = -distance + 11;
-      t_bound = 0.0026 * exp(0.9729 * distance');
+            d = best
+            cas9_pos[c, 0] = dna_pos[d, 0]
+            cas9_pos[c, 1] = dna_pos[d, 1]
+            if d < num_junk:
+                cas9_state[c] = BOUND_JUNK
+                cas9_bound_to[c] = d
+                cas9_bound_until[c] = sim_time + dna_bind_time[d]
+            elif np.random.random() <= success_prob:
+                # IMMEDIATE SUCCESS: no dwell, both disappear
+                kills += 1
+                dna_alive[d] = False
+                cas9_alive[c] = False
+                cas9_left -= 1
+            else:
+                # FAILED MATCH: dwell for the virus time, then detach
+                dna_bound[d] = True
+                dna_cooldown_until[d] = sim_time + cooldown_virus_fail
+                cas9_state[c] = BOUND_VIRUS
+                cas9_bound_to[c] = d
+                cas9_bound_until[c] = sim_time + dna_bind_time[d]
 
-    Then scaled by VIRUS_TIME_SCALE so max is ~12 s.
+        sim_time += dt
+        ticks += 1
+        filled = _nb_record(rec, filled, sim_time, rec_interval, num_junk, num_virus - kills,
+                            cas9_alive, cas9_state)
+
+    if sim_time < duration:     # stopped early: carry the last state on
+        _nb_record(rec, filled, np.inf, rec_interval, num_junk, num_virus - kills,
+                   cas9_alive, cas9_state)
+    return kills, ticks
+
+
+@lru_cache(maxsize=None)
+def _nb_compiled():
+    """Import numba and njit the kernels (once per process); returns _nb_run."""
+    global _nb_move, _nb_record, _nb_run
+    import numba
+    # _nb_run looks the other two up as globals when it compiles
+    _nb_move = numba.njit(cache=True)(_nb_move)
+    _nb_record = numba.njit(cache=True)(_nb_record)
+    _nb_run = numba.njit(cache=True)(_nb_run)
+    return _nb_run
+
+
+def _nb_params(cfg):
+    """The SimConfig values _nb_run needs, as one tuple of floats."""
+    return tuple(float(v) for v in (
+        cfg.width, cfg.height, cfg.dna_radius, cfg.cas9_radius, cfg.contact_distance,
+        cfg.cas9_speed, cfg.dna_turn_prob, cfg.cas9_turn_prob,
+        cfg.cooldown_junk, cfg.cooldown_virus_fail, cfg.success_prob))
+
+
+def run_single_sim_numba(num_junk, num_virus, num_cas9, seed=None, profiler=None,
+                         duration=EXPERIMENT_DURATION, recorder=None, config=None):
     """
-    x_vals = list(range(1, 11))
+    run_single_sim on the compiled engine. The starting state is drawn
+    from the seed's numpy generator (same draws as the numpy engine), the
+    kernel's own stream is seeded from it. profiler gets ticks and kills,
+    recorder (PopulationRecorder) the population counts. The config goes
+    in as kernel arguments, not globals (numba freezes globals at compile
+    time), so one compiled kernel serves every config.
+    """
+    if not HAVE_NUMBA:
+        raise ImportError("the numba engine needs numba installed")
+    kernel = _nb_compiled()
+    cfg = config if config is not None else DEFAULT_CONFIG
+    junk_sampler, virus_sampler = cfg.samplers()
+
+    g = np.random.default_rng(seed)
+    directions = np.array(DIRECTIONS, dtype=float)
+    n_dna = num_junk + num_virus
+    dna_pos = g.uniform(cfg.dna_radius, [cfg.width - cfg.dna_radius, cfg.height - cfg.dna_radius],
+                        size=(n_dna, 2))
+    dna_dir = directions[g.integers(0, len(directions), n_dna)]
+    dna_bind_time = np.concatenate([junk_sampler.draw(g, num_junk),
+                                    virus_sampler.draw(g, num_virus) * cfg.time_scale])
+    cas9_pos = g.uniform(cfg.cas9_radius, [cfg.width - cfg.cas9_radius, cfg.height - cfg.cas9_radius],
+                         size=(num_cas9, 2))
+    cas9_dir = directions[g.integers(0, len(directions), num_cas9)]
+
+    if recorder is not None:
+        rec, rec_interval = recorder.counts, float(recorder.interval)
+    else:
+        rec, rec_interval = np.zeros((0, len(POPULATION_FIELDS)), dtype=np.int32), 1.0
+    kills, ticks = kernel(int(g.integers(2 ** 31)), num_junk, dna_pos, dna_dir, dna_bind_time,
+                          cas9_pos, cas9_dir, directions, float(duration), rec, rec_interval,
+                          _nb_params(cfg))
+    if recorder is not None:
+        recorder.filled = len(recorder.times)
+        recorder.next_time = math.inf
+    if profiler is not None:
+        profiler.counts["ticks"] += ticks
+        profiler.counts["kills"] += kills
+    return kills / num_virus if num_virus > 0 else 0.0
+
+
+def prepare_numba():
+    """
+    Compile (or load from the cache) the numba kernels once in the parent
+    before a sweep, so the pool workers all find them in the cache.
+    """
+    if not HAVE_NUMBA:
+        print("numba is not installed, engine numba falls back to the python engine")
+        return
+    t0 = time.perf_counter()
+    run_single_sim_numba(1, 1, 1, seed=0, duration=UPDATE_INTERVAL_MS / 1000.0)
+    print(f"numba engine ready ({time.perf_counter() - t0:.1f} s, cached in __pycache__)")
 
-    p = [0.75 * (0.25 ** (xi - 1)) for xi in x_vals]
-    s = sum(p)
-    p = [pi / s for pi in p]
 
-    dwell_times = []
+# --------------------
+# SWEEP GRID
+# --------------------
+# junk DNA: 0 to 300, step 10
+SWEEP_JUNK = list(range(0, 301, 10))
+# cas9 = virus: 1 to <90, step 3 => 1,4,7,...,88
+SWEEP_CV = list(range(1, 90, 3))
 
-    for _ in range(n):
-        distance = random.choices(x_vals, weights=p, k=1)[0]
-        distance_prime = -distance + 11
-        t_bound = 0.0026 * math.exp(0.9729 * distance_prime)
-        t_bound *= VIRUS_TIME_SCALE
-        dwell_times.append(t_bound)
 
-    return dwell_times
+def sweep_points():
+    """
+    (junk, cv) grid in the row order the MATLAB surface script reshapes:
+    for each junk level, cv runs through all its values.
+    """
+    points = []
+    for junk in SWEEP_JUNK:
+        for cv in SWEEP_CV:
+            points.append((junk, cv))
+    return points
 
 
 # --------------------
-# DUMMY CANVAS (no-op, replaces Tk canvas)
+# ADAPTIVE SWEEP (refine the grid only where the surface changes)
 # --------------------
-class DummyCanvas:
-    def create_oval(self, *args, **kwargs):
-        return 0
+# cells are index boxes (i0, i1, j0, j1) on the SWEEP_JUNK x SWEEP_CV grid;
+# the run starts from nodes every ADAPTIVE_COARSE_STEP indices and splits a
+# cell into four while its corners disagree, down to single grid cells
+ADAPTIVE_COARSE_STEP = 8
+ADAPTIVE_GRADIENT = 0.05      # refine if corner densities spread more than this ...
+ADAPTIVE_CI = 0.05            # ... or a corner's CI half-width is wider than this
+
+# the evaluated (scattered) points; OUTPUT_FILE gets the interpolated full grid
+ADAPTIVE_POINTS_FILE = "batch_results_adaptive_points.txt"
+
+
+def grid_point(i, j):
+    return SWEEP_JUNK[i], SWEEP_CV[j]
+
+
+def coarse_cells(step):
+    def nodes(n):
+        return sorted(set(range(0, n - 1, step)) | {n - 1})
+    ii, jj = nodes(len(SWEEP_JUNK)), nodes(len(SWEEP_CV))
+    return [(i0, i1, j0, j1) for i0, i1 in zip(ii, ii[1:]) for j0, j1 in zip(jj, jj[1:])]
+
+
+def cell_corners(cell):
+    i0, i1, j0, j1 = cell
+    return [grid_point(i, j) for i in (i0, i1) for j in (j0, j1)]
 
-    def coords(self, *args, **kwargs):
-        pass
 
-    def delete(self, *args, **kwargs):
-        pass
+def needs_refinement(cell, results, gradient, ci):
+    i0, i1, j0, j1 = cell
+    if i1 - i0 <= 1 and j1 - j0 <= 1:
+        return False                      # already at grid resolution
+    stats = [results[p] for p in cell_corners(cell)]
+    means = [s.mean for s in stats]
+    if max(means) - min(means) > gradient:
+        return True
+    # the same interval the ci_target stopping rule uses; it is NaN with a
+    # single replicate, then only the gradient counts
+    return any((s.ci_high - s.ci_low) / 2 > ci for s in stats if not math.isnan(s.ci_low))
+
+
+def split_cell(cell):
+    """Quarter a cell (halve it along an axis that is only one step wide)."""
+    i0, i1, j0, j1 = cell
+    iv = [i0, (i0 + i1) // 2, i1] if i1 - i0 > 1 else [i0, i1]
+    jv = [j0, (j0 + j1) // 2, j1] if j1 - j0 > 1 else [j0, j1]
+    return [(a, b, c, d) for a, b in zip(iv, iv[1:]) for c, d in zip(jv, jv[1:])]
+
+
+def adaptive_sweep(evaluate, gradient=ADAPTIVE_GRADIENT, ci=ADAPTIVE_CI,
+                   coarse_step=ADAPTIVE_COARSE_STEP):
+    """
+    Refine level by level. evaluate(points) must make sure every point in
+    the list has a result and return the {(junk, cv): PointStats} seen so
+    far. The decisions only depend on those results, so re-running with
+    the points of a checkpoint log takes exactly the same path.
+    Returns (results, leaf cells).
+    """
+    cells = coarse_cells(coarse_step)
+    leaves = []
+    results = {}
+    while cells:
+        nodes = []
+        for cell in cells:
+            for p in cell_corners(cell):
+                if p not in results and p not in nodes:
+                    nodes.append(p)
+        results = evaluate(sorted(nodes))
+
+        refine = []
+        for cell in cells:
+            if needs_refinement(cell, results, gradient, ci):
+                refine.append(cell)
+            else:
+                leaves.append(cell)
+        cells = [sub for cell in refine for sub in split_cell(cell)]
+    return results, leaves
+
+
+def interpolate_grid(results, leaves):
+    """
+    Full sweep grid from the scattered results: evaluated points as they
+    are, every other point bilinear from the corners of the smallest leaf
+    cell around it. Interpolated points get n = 0 and NaN errors.
+    """
+    grid = {}
+    nan = float("nan")
+    for cell in sorted(leaves, key=lambda c: -(c[1] - c[0]) * (c[3] - c[2])):
+        i0, i1, j0, j1 = cell
+        (m00, m01, m10, m11) = [results[p].mean for p in cell_corners(cell)]
+        for i in range(i0, i1 + 1):
+            t = (i - i0) / (i1 - i0)
+            for j in range(j0, j1 + 1):
+                u = (j - j0) / (j1 - j0)
+                mean = (m00 * (1 - t) * (1 - u) + m01 * (1 - t) * u
+                        + m10 * t * (1 - u) + m11 * t * u)
+                grid[grid_point(i, j)] = PointStats(mean, nan, nan, nan, 0)
+    grid.update(results)
+    return grid
 
 
 # --------------------
-# CLASSES
+# REPLICATES
 # --------------------
-class DNA:
-    def __init__(self, canvas, x, y, radius, kind):
-        self.canvas = canvas
-        self.x = x
-        self.y = y
-        self.r = radius
-        self.kind = kind        # 'junk' or 'virus'
-        self.alive = True
-        self.dir = random.choice(DIRECTIONS)
-        self.cooldown_until = 0.0
-        self.bound = False      # prevents multi-Cas9 binding
+# kinetics: mean PopulationRecorder counts over the replicates (only with
+# --kinetics, and never in the log)
+PointStats = namedtuple("PointStats", "mean sem ci_low ci_high n kinetics", defaults=(None,))
 
-        if self.kind == "junk":
-            self.junk_bind_time = sample_junk_bind_time()
-        else:
-            self.junk_bind_time = None
 
-        # virus-specific bind time (set later in create_dna)
-        self.virus_bind_time = None
+def agresti_coull(values, num_virus):
+    """
+    Centre and half-width of the Agresti-Coull 95 % interval of the kill
+    fraction, pooling the kills of all the runs over their n * num_virus
+    viruses (CI_Z**2 pseudo-viruses, half of them killed, join them), so a
+    few identical runs still get an interval as wide as their virus count
+    allows instead of a zero-width one.
+    """
+    trials = len(values) * num_virus
+    if trials == 0:
+        return 0.0, 0.0         # no virus, the density is 0 every run
+    kills = sum(round(v * num_virus) for v in values)
+    n = trials + CI_Z ** 2
+    centre = (kills + CI_Z ** 2 / 2) / n
+    return centre, CI_Z * math.sqrt(centre * (1 - centre) / n)
 
-        # graphical stuff is ignored in batch mode, but we keep calls
-        self.id = canvas.create_oval(
-            self.x - self.r, self.y - self.r,
-            self.x + self.r, self.y + self.r
-        )
 
-    def move_step(self, speed):
-        if not self.alive:
-            return
+def summarize(values, num_virus=1):
+    """
+    Mean, standard error and Agresti-Coull CI (within [0, 1]) of the kill
+    densities of runs that started with num_virus viruses each.
+    """
+    n = len(values)
+    mean = sum(values) / n
+    if n > 1:
+        var = sum((v - mean) ** 2 for v in values) / (n - 1)
+        sem = math.sqrt(var / n)
+        centre, half = agresti_coull(values, num_virus)
+        ci_low, ci_high = max(centre - half, 0.0), min(centre + half, 1.0)
+    else:
+        sem = ci_low = ci_high = float("nan")
+    return PointStats(mean, sem, ci_low, ci_high, n)
 
-        dx, dy = self.dir
-        new_x = self.x + dx * speed * 0.3
-        new_y = self.y + dy * speed * 0.3
-
-        # walls
-        if new_x - self.r < 0:
-            new_x = self.r
-            dx = -dx
-        elif new_x + self.r > WIDTH:
-            new_x = WIDTH - self.r
-            dx = -dx
-
-        if new_y - self.r < 0:
-            new_y = self.r
-            dy = -dy
-        elif new_y + self.r > HEIGHT:
-            new_y = HEIGHT - self.r
-            dy = -dy
-
-        self.x = new_x
-        self.y = new_y
-        self.dir = (dx, dy)
-
-        if random.random() < 0.1:
-            self.dir = random.choice(DIRECTIONS)
-
-        self.canvas.coords(
-            self.id,
-            self.x - self.r, self.y - self.r,
-            self.x + self.r, self.y + self.r
-        )
-
-
-class Cas9:
-    def __init__(self, canvas, x, y, radius):
-        self.canvas = canvas
-        self.x = x
-        self.y = y
-        self.r = radius
-
-        self.dir = random.choice(DIRECTIONS)
-        self.state = "free"       # 'free', 'bound_junk', 'bound_virus'
-        self.bound_to = None
-        self.bound_until = 0.0
-        self.alive = True
-
-        self.id = canvas.create_oval(
-            self.x - self.r, self.y - self.r,
-            self.x + self.r, self.y + self.r
-        )
-
-    def bind_to(self, dna, now, bind_time, state_name):
-        self.state = state_name
-        self.bound_to = dna
-        self.bound_until = now + bind_time
-        self.x, self.y = dna.x, dna.y
-        self.update_canvas_pos()
-
-    def update_canvas_pos(self):
-        self.canvas.coords(
-            self.id,
-            self.x - self.r, self.y - self.r,
-            self.x + self.r, self.y + self.r
-        )
-
-    def move_step(self, speed, now):
-        if not self.alive:
-            return
 
-        # --------------
-        # BOUND STATES
-        # --------------
-        if self.state in ("bound_junk", "bound_virus"):
-            if self.bound_to and self.bound_to.alive:
-                self.x, self.y = self.bound_to.x, self.bound_to.y
-                self.update_canvas_pos()
-
-            if now >= self.bound_until:
-                # junk: detach and put junk on cooldown
-                if self.state == "bound_junk":
-                    if self.bound_to and self.bound_to.alive:
-                        self.bound_to.cooldown_until = now + COOLDOWN_JUNK
-                    self.state = "free"
-                    self.bound_to = None
-
-                # virus: this state now means FAILED recognition dwell
-                elif self.state == "bound_virus":
-                    if self.bound_to and self.bound_to.alive:
-                        self.bound_to.bound = False
-                        # virus cooldown was set at collision time
-                    self.state = "free"
-                    self.bound_to = None
+def sim_kwargs(sim_opts):
+    """run_single_sim keywords for a sweep's sim_opts (dt_scale, ccd)."""
+    if not sim_opts:
+        return {}
+    return {"dt": UPDATE_INTERVAL_MS / 1000.0 * sim_opts.get("dt_scale", 1),
+            "ccd": sim_opts.get("ccd", False)}
 
-            return
 
-        # --------------
-        # FREE STATE (Brownian)
-        # --------------
-        dx, dy = self.dir
-        new_x = self.x + dx * speed
-        new_y = self.y + dy * speed
+def draw_replicates(junk, cv, engine, start, n, seed=None, sim_opts=None,
+                    kinetics=None, curves=None, cache=None, config=None):
+    """
+    Replicates start .. start+n-1 of one grid point. Replicate r is seeded
+    with task_seed(seed, junk, cv, r). The numpy engine runs them as a
+    single batched ensemble, the other engines one after another.
+    kinetics: record the population every `kinetics` seconds and append
+    each replicate's counts to the list `curves`.
+    cache: optional ResultCache; only the replicates missing from it run.
+    config: SimConfig of every replicate (DEFAULT_CONFIG if None).
+    """
+    if config is None:
+        config = DEFAULT_CONFIG
+    seeds = [task_seed(seed, junk, cv, r) for r in range(start, start + n)]
+    if engine == "numpy":
+        if sim_opts:
+            raise ValueError("dt_scale / ccd are only supported by the python engine")
+        if kinetics:
+            raise ValueError("kinetics recording needs the python, numba or ssa engine")
+        if cache is None or seed is None:
+            return list(run_ensemble_numpy(junk, cv, cv, n, seeds=seeds, config=config))
+        # every replicate has its own generator, so the misses can run as
+        # a smaller ensemble and still give the values the full one would
+        keys = [cache_key(junk, cv, cv, engine, s, EXPERIMENT_DURATION, config=config)
+                for s in seeds]
+        values = [cache.get(k) for k in keys]
+        miss = [i for i, v in enumerate(values) if v is None]
+        if miss:
+            new = run_ensemble_numpy(junk, cv, cv, len(miss), seeds=[seeds[i] for i in miss],
+                                     config=config)
+            for i, v in zip(miss, new):
+                values[i] = float(v)
+                cache.put(keys[i], values[i])
+        return values
+    kwargs = sim_kwargs(sim_opts)
+    kwargs["config"] = config
+    if not kinetics:
+        return [run_single_sim(junk, cv, cv, engine=engine, seed=s, cache=cache, **kwargs)
+                for s in seeds]
+
+    values = []
+    for s in seeds:
+        recorder = PopulationRecorder(kinetics, EXPERIMENT_DURATION)
+        values.append(run_single_sim(junk, cv, cv, engine=engine, seed=s, recorder=recorder,
+                                     cache=cache, **kwargs))
+        curves.append(recorder.counts)
+    return values
+
+
+def run_replicates(junk, cv, engine="python", replicates=1, ci_target=None,
+                   min_replicates=MIN_REPLICATES, max_replicates=MAX_REPLICATES,
+                   seed=None, sim_opts=None, kinetics=None, cache=None, config=None):
+    """
+    Run one grid point several times and summarize it.
+
+    Fixed mode (ci_target=None): exactly `replicates` runs.
+    Adaptive mode: start with min_replicates runs and keep adding runs
+    until the Agresti-Coull CI half-width of the pooled kills is below
+    ci_target (or max_replicates is reached); unlike CI_Z * sem it doesn't
+    collapse to zero when the first runs happen to agree. Points with many
+    viruses stop early, the noisy low-count corners get the extra runs.
+    The python engine adds one run at a time; the numpy engine doubles
+    the ensemble each round so the per-call overhead stays amortized.
+    sim_opts: {"dt_scale": k, "ccd": bool} for longer, swept ticks.
+    kinetics: sample interval (s) of the population curves, whose mean
+    over the replicates becomes stats.kinetics.
+    cache: optional ResultCache shared by all the runs.
+    config: SimConfig (or a dict of fields changed from DEFAULT_CONFIG,
+    as the sweep log stores it) with the model parameters.
+    """
+    if isinstance(config, dict):
+        config = make_config(config)
+    curves = []
+    n_start = replicates if ci_target is None else min_replicates
+    values = draw_replicates(junk, cv, engine, 0, n_start, seed, sim_opts, kinetics, curves,
+                             cache, config)
+
+    if ci_target is not None:
+        while len(values) < max_replicates:
+            if agresti_coull(values, cv)[1] < ci_target:
+                break
+            batch = len(values) if engine == "numpy" else 1
+            batch = min(batch, max_replicates - len(values))
+            values += draw_replicates(junk, cv, engine, len(values), batch, seed, sim_opts,
+                                      kinetics, curves, cache, config)
+
+    stats = summarize(values, cv)
+    if kinetics:
+        stats = stats._replace(kinetics=np.mean(curves, axis=0))
+    return stats
+
+
+# --------------------
+# CHECKPOINT LOG
+# --------------------
+# every finished point goes to LOG_FILE as soon as it is done, in whatever
+# order it finished; the header pins down the model and the run settings
+LOG_COLUMNS = ["init_cas9_virus", "init_junk", "virus_kill_density",
+               "kill_density_sem", "ci_low", "ci_high", "n_replicates"]
+
+
+def make_config(overrides=None):
+    """DEFAULT_CONFIG with the SimConfig fields in the dict `overrides` changed."""
+    return DEFAULT_CONFIG._replace(**(overrides or {}))
+
+
+def model_config(config=DEFAULT_CONFIG):
+    """Every model parameter that changes what run_single_sim returns."""
+    if config is None:
+        config = DEFAULT_CONFIG
+    model = {name.upper(): value for name, value in config._asdict().items()}
+    model.update({
+        "UPDATE_INTERVAL_MS": UPDATE_INTERVAL_MS,
+        "EXPERIMENT_DURATION": EXPERIMENT_DURATION,
+        "JUNK_PROBS": JUNK_PROBS,
+    })
+    return model
+
+
+def run_model(run_config):
+    """model_config() of a log header's run settings (with their --set overrides)."""
+    return model_config(make_config(run_config["rep_opts"].get("config")))
+
+
+def same_model(logged, config):
+    """
+    True if a log header's model matches config. Parameters the header
+    doesn't list yet (older logs) were fixed at their defaults back then.
+    """
+    now = json.loads(json.dumps(model_config(config)))
+    return all(now.get(name) == value for name, value in logged.items())
+
+
+def start_log(path, run_config):
+    """New log: keep any old one as <path>.bak, then write the header."""
+    if os.path.exists(path):
+        os.replace(path, path + ".bak")
+        print(f"Existing {path} moved to {path}.bak")
+    model = run_model(run_config)
+    header = {"model": model, "run": run_config, "hash": sweep_hash(model, run_config)}
+    with open(path, "w") as f:
+        f.write("# config " + json.dumps(header) + "\n")
+        f.write("\t".join(LOG_COLUMNS) + "\n")
 
-        if new_x - self.r < 0:
-            new_x = self.r
-            dx = -dx
-        elif new_x + self.r > WIDTH:
-            new_x = WIDTH - self.r
-            dx = -dx
 
-        if new_y - self.r < 0:
-            new_y = self.r
-            dy = -dy
-        elif new_y + self.r > HEIGHT:
-            new_y = HEIGHT - self.r
-            dy = -dy
+def read_log(path):
+    """
+    Return (header config, {(junk, cv): PointStats}). A last line cut off
+    by a kill is not a complete row and is skipped.
+    """
+    config = None
+    done = {}
+    with open(path) as f:
+        for line in f:
+            if line.startswith("# config "):
+                config = json.loads(line[len("# config "):])
+                continue
+            if not line.endswith("\n"):
+                continue
+            parts = line.split("\t")
+            if len(parts) != len(LOG_COLUMNS) or parts[0] == LOG_COLUMNS[0]:
+                continue
+            cv, junk = int(parts[0]), int(parts[1])
+            mean, sem, ci_low, ci_high = map(float, parts[2:6])
+            done[(junk, cv)] = PointStats(mean, sem, ci_low, ci_high, int(parts[6]))
+    if config is None:
+        raise ValueError(f"{path} has no '# config' header, not a batch log")
+    return config, done
+
+
+def trim_partial_line(path):
+    """Cut off a last row that was only half written when the run was killed."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
 
-        self.x = new_x
-        self.y = new_y
-        self.dir = (dx, dy)
+def as_logged(stats):
+    """stats rounded exactly as read_log() will give them back."""
+    return PointStats(*(float(f"{v:.6f}") for v in stats[:4]), stats.n)
 
-        if random.random() < 0.2:
-            self.dir = random.choice(DIRECTIONS)
 
-        self.update_canvas_pos()
+def append_log(f, junk, cv, stats):
+    f.write(f"{cv}\t{junk}\t{stats.mean:.6f}\t{stats.sem:.6f}\t"
+            f"{stats.ci_low:.6f}\t{stats.ci_high:.6f}\t{stats.n}\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class LogWriter:
+    """append_log() as a writer, so the log can sit with the output writers."""
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "a")
+
+    def add(self, junk, cv, stats):
+        append_log(self.f, junk, cv, stats)
+
+    def close(self):
+        self.f.close()
 
 
 # --------------------
-# UTILS
+# SHARDED SWEEPS
 # --------------------
-def distance(a, b):
-    return math.hypot(a.x - b.x, a.y - b.y)
-
+# --shard I/N runs the I-th of N slices of the grid (I from 0) into its own
+# log next to --log, e.g. batch_results.shard0of4.log, so the N shards can
+# run on different machines sharing a directory. --merge-shards checks the
+# shard logs belong to one finished sweep and joins them into --log, from
+# which the output files are written as usual. Every point is seeded by
+# its place in the grid, so the merged results are the ones a single
+# machine would have got.
+SHARD_PATTERN = "{stem}.shard{index}of{count}{ext}"
+
+
+def parse_shard(text):
+    """'I/N' -> (I, N), with 0 <= I < N."""
+    index, sep, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        sep = ""
+    if not sep or not 0 <= index < count:
+        raise SystemExit(f"--shard expects I/N with 0 <= I < N (e.g. 0/4), got {text!r}")
+    return index, count
+
+
+def shard_log_path(log_path, index, count):
+    stem, ext = os.path.splitext(log_path)
+    return SHARD_PATTERN.format(stem=stem, index=index, count=count, ext=ext)
+
+
+def shard_points(points, index, count):
+    """
+    The points of shard index/count: every count-th point rather than a
+    contiguous block, so each shard gets the same mix of small and large
+    populations and they all take about as long.
+    """
+    return points[index::count]
 
-def create_dna(canvas, num_junk, num_virus):
-    dna_list = []
 
-    virus_dwell_times = generate_virus_dwell_times(num_virus)
-    virus_idx = 0
+def sweep_hash(model, run_config):
+    """
+    Short hash of everything that decides a sweep's results, written in
+    every log header. The shard is left out: all shards of a sweep share it.
+    """
+    run = {k: v for k, v in run_config.items() if k != "shard"}
+    text = json.dumps({"model": model, "run": run}, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
 
-    # junk DNA
-    for _ in range(num_junk):
-        x = random.uniform(DNA_RADIUS, WIDTH - DNA_RADIUS)
-        y = random.uniform(DNA_RADIUS, HEIGHT - DNA_RADIUS)
-        dna_list.append(DNA(canvas, x, y, DNA_RADIUS, "junk"))
 
-    # virus DNA
-    for _ in range(num_virus):
-        x = random.uniform(DNA_RADIUS, WIDTH - DNA_RADIUS)
-        y = random.uniform(DNA_RADIUS, HEIGHT - DNA_RADIUS)
-        d = DNA(canvas, x, y, DNA_RADIUS, "virus")
-        d.virus_bind_time = virus_dwell_times[virus_idx]
-        virus_idx += 1
-        dna_list.append(d)
+def merge_shards(log_path, paths):
+    """
+    Check that the logs in paths are the complete shards of one sweep,
+    run with the current model, then write all their points to log_path
+    as a single ordinary log. Returns read_log(log_path).
+    """
+    if not paths:
+        raise SystemExit(f"No shard logs to merge (looked for {shard_log_path(log_path, '*', '*')})")
+    shards = {}
+    for path in paths:
+        config, done = read_log(path)
+        run = config["run"]
+        if "shard" not in run:
+            raise SystemExit(f"{path} is not a shard log (run without --shard)")
+        if config.get("hash") != sweep_hash(config["model"], run):
+            raise SystemExit(f"{path}: the header no longer matches its hash; was it edited?")
+        index, count = run["shard"]
+        if (index, count) in shards:
+            raise SystemExit(f"{path} and {shards[index, count][0]} are both shard {index}/{count}")
+        shards[index, count] = (path, config, done)
+
+    hashes = {config["hash"] for _, config, _ in shards.values()}
+    if len(hashes) > 1:
+        listing = "\n".join(f"  {path}: {config['hash']}" for path, config, _ in shards.values())
+        raise SystemExit(f"The shard logs come from different sweeps (config hashes differ):\n{listing}")
+    path, config, _ = next(iter(shards.values()))
+    run_config = {k: v for k, v in config["run"].items() if k != "shard"}
+    if not same_model(config["model"], make_config(run_config["rep_opts"].get("config"))):
+        raise SystemExit(f"The model constants differ from the ones {path} was run with; "
+                         f"the shards can't be merged by this version.")
+
+    counts = sorted({n for _, n in shards})
+    if len(counts) > 1:
+        raise SystemExit(f"The shard logs split the grid in different numbers of shards: "
+                         f"{', '.join(map(str, counts))}")
+    count = counts[0]
+    missing = sorted(set(range(count)) - {i for i, _ in shards})
+    if missing:
+        raise SystemExit(f"Expected shards 0..{count - 1} of {count}, missing "
+                         + ", ".join(f"{i}/{count}" for i in missing))
+
+    points = sweep_points()
+    merged = {}
+    unfinished = []
+    for (index, count), (path, _, done) in sorted(shards.items()):
+        expected = shard_points(points, index, count)
+        if set(done) - set(expected):
+            raise SystemExit(f"{path} has points that are not part of shard {index}/{count}")
+        if len(done) < len(expected):
+            unfinished.append(f"  {path}: {len(done)} of {len(expected)} points, "
+                              f"finish it with --resume --shard {index}/{count}")
+        merged.update(done)
+    if unfinished:
+        raise SystemExit("Some shards are not finished:\n" + "\n".join(unfinished))
+
+    start_log(log_path, run_config)
+    with open(log_path, "a") as f:
+        for point in points:
+            append_log(f, *point, merged[point])
+    print(f"Merged {len(shards)} shards of sweep {config['hash']} into {log_path}")
+    return read_log(log_path)
 
-    return dna_list
 
+# --------------------
+# RESULT CACHE
+# --------------------
+# seeded run_single_sim results in an SQLite file, keyed by a hash of
+# everything that decides them, so a repeated or overlapping sweep (same
+# --seed) only simulates the runs it has not seen before
+CACHE_FILE = "sim_cache.sqlite"
+CACHE_MAX_ENTRIES = 1_000_000     # least recently used runs beyond this are evicted
+CACHE_EVICT_EVERY = 1000          # ... checked every this many inserts of a process
+
+# part of every key: bump it when a change to an engine changes what it
+# returns for the same seed, and every older entry stops matching
+CACHE_VERSION = 1
+
+
+def seed_id(seed):
+    """JSON-able identity of an int, str or SeedSequence seed."""
+    if np is not None and isinstance(seed, np.random.SeedSequence):
+        return {"entropy": str(seed.entropy), "spawn_key": [int(k) for k in seed.spawn_key]}
+    return {type(seed).__name__: seed}
+
+
+def cache_key(num_junk, num_virus, num_cas9, engine, seed, duration,
+              dt=None, ccd=False, recorder=None, config=DEFAULT_CONFIG):
+    """sha256 of the model parameters, the run's settings and its seed."""
+    run = {
+        "version": CACHE_VERSION,
+        "model": model_config(config),
+        "populations": [num_junk, num_virus, num_cas9],
+        "engine": engine, "seed": seed_id(seed), "duration": duration,
+        "dt": UPDATE_INTERVAL_MS / 1000.0 if dt is None else dt, "ccd": ccd,
+        "record": None if recorder is None else [recorder.interval, len(recorder.times)],
+    }
+    return hashlib.sha256(json.dumps(run, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Kill densities (and recorded population counts) by cache_key(). Pool
+    workers can share one: the object pickles as just its path and every
+    process opens its own connection, SQLite does the locking. A hit
+    refreshes the entry's last use; evict() trims to max_entries, least
+    recently used first (put() calls it every CACHE_EVICT_EVERY inserts,
+    so a long sweep can't grow the file far past the limit), and clear()
+    empties it.
+    """
 
-def create_cas9(canvas, num_cas9):
-    lst = []
-    for _ in range(num_cas9):
-        x = random.uniform(CAS9_RADIUS, WIDTH - CAS9_RADIUS)
-        y = random.uniform(CAS9_RADIUS, HEIGHT - CAS9_RADIUS)
-        lst.append(Cas9(canvas, x, y, CAS9_RADIUS))
-    return lst
+    def __init__(self, path=CACHE_FILE, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.inserts = 0
+        self._db = None
+
+    def __getstate__(self):
+        return {"path": self.path, "max_entries": self.max_entries, "inserts": 0, "_db": None}
+
+    def db(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=60)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS runs (key TEXT PRIMARY KEY, "
+                             "density REAL, counts BLOB, last_used REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS runs_last_used ON runs (last_used)")
+        return self._db
+
+    def get(self, key, recorder=None):
+        """The cached density (filling recorder from the entry), or None."""
+        db = self.db()
+        row = db.execute("SELECT density, counts FROM runs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with db:
+            db.execute("UPDATE runs SET last_used = ? WHERE key = ?", (time.time(), key))
+        if recorder is not None:
+            recorder.counts[:] = np.frombuffer(row[1], dtype=np.int32).reshape(recorder.counts.shape)
+            recorder.filled = len(recorder.times)
+            recorder.next_time = math.inf
+        return row[0]
+
+    def put(self, key, density, recorder=None):
+        counts = None if recorder is None else recorder.counts.tobytes()
+        with self.db() as db:
+            db.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                       (key, float(density), counts, time.time()))
+        self.inserts += 1
+        if self.inserts % CACHE_EVICT_EVERY == 0:
+            self.evict()
+
+    def __len__(self):
+        return self.db().execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def evict(self):
+        """Drop the least recently used entries beyond max_entries; returns how many."""
+        with self.db() as db:
+            cur = db.execute("DELETE FROM runs WHERE key IN (SELECT key FROM runs "
+                             "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+        return cur.rowcount
+
+    def clear(self):
+        with self.db() as db:
+            db.execute("DELETE FROM runs")
+        self.db().execute("VACUUM")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
 
 
 # --------------------
-# SINGLE SIMULATION
+# OUTPUT WRITERS
 # --------------------
-def run_single_sim(num_junk, num_virus, num_cas9):
+# every writer takes results one point at a time, in any order, through
+# add(junk, cv, stats) and finishes its file(s) in close()
+GRID_FIELDS = ("virus_kill_density", "kill_density_sem", "ci_low", "ci_high", "n_replicates")
+CHECKPOINT_SECONDS = 30     # the whole-file formats (npz, mat) are rewritten this often
+
+
+class TsvWriter:
     """
-    Run one 10 s simulation and return:
-      - virus_kill_density = kills / initial_virus
+    The long-format file the MATLAB script reads. Rows must be in
+    sweep_points() order, so a row is written as soon as every earlier
+    row has arrived.
     """
-    canvas = DummyCanvas()
 
-    dna_list = create_dna(canvas, num_junk, num_virus)
-    cas9_list = create_cas9(canvas, num_cas9)
+    def __init__(self, path, points, with_stats):
+        self.path = path
+        self.points = points
+        self.with_stats = with_stats
+        self.pending = {}
+        self.next_row = 0
+        self.f = open(path, "w")
+        cols = ["init_cas9_virus", "init_junk", "virus_kill_density"]
+        if with_stats:
+            cols += ["kill_density_sem", "ci_low", "ci_high", "n_replicates"]
+        self.f.write("\t".join(cols) + "\n")
+
+    def add(self, junk, cv, stats):
+        self.pending[(junk, cv)] = stats
+        while self.next_row < len(self.points) and self.points[self.next_row] in self.pending:
+            point = self.points[self.next_row]
+            self._write_row(*point, self.pending.pop(point))
+            self.next_row += 1
+        self.f.flush()
+
+    def _write_row(self, junk, cv, stats):
+        row = f"{cv}\t{junk}\t{stats.mean:.6f}"
+        if self.with_stats:
+            row += f"\t{stats.sem:.6f}\t{stats.ci_low:.6f}\t{stats.ci_high:.6f}\t{stats.n}"
+        self.f.write(row + "\n")
+
+    def close(self):
+        self.f.close()
+        if self.next_row < len(self.points):
+            junk, cv = self.points[self.next_row]
+            raise ValueError(f"{self.path} is missing {len(self.points) - self.next_row} grid points, "
+                             f"e.g. junk={junk}, cv={cv}; finish the sweep with --resume")
+
+
+class GridWriter:
+    """
+    Results as junk x cv matrices (rows: init_junk, columns:
+    init_cas9_virus), NaN where a point has not arrived yet.
+    Subclasses decide where the matrices live and how they are saved.
+    """
 
-    capture_count = 0  # number of virus kills
+    def __init__(self, path, points):
+        self.path = path
+        self.junk_vals = sorted({junk for junk, _ in points})
+        self.cv_vals = sorted({cv for _, cv in points})
+        self.junk_idx = {v: i for i, v in enumerate(self.junk_vals)}
+        self.cv_idx = {v: i for i, v in enumerate(self.cv_vals)}
+        self.grids = self._make_grids((len(self.junk_vals), len(self.cv_vals)))
 
-    sim_time = 0.0
-    dt = UPDATE_INTERVAL_MS / 1000.0  # 0.02 s
+    def _make_grids(self, shape):
+        return {name: np.full(shape, np.nan) for name in GRID_FIELDS}
 
-    while sim_time < EXPERIMENT_DURATION:
-        # movement
-        for d in dna_list:
-            d.move_step(CAS9_SPEED)
-        for c in cas9_list:
-            c.move_step(CAS9_SPEED, sim_time)
+    def add(self, junk, cv, stats):
+        i, j = self.junk_idx[junk], self.cv_idx[cv]
+        for name, value in zip(GRID_FIELDS, (stats.mean, stats.sem, stats.ci_low, stats.ci_high, stats.n)):
+            self.grids[name][i, j] = value
 
-        # collisions
-        for c in cas9_list:
-            if not c.alive or c.state != "free":
-                continue
+    def axes(self):
+        return {"init_junk": np.array(self.junk_vals), "init_cas9_virus": np.array(self.cv_vals)}
 
-            for d in dna_list:
-                if not d.alive:
-                    continue
-
-                # global cooldown (junk or virus)
-                if sim_time < d.cooldown_until:
-                    continue
-
-                # virus already occupied by a failed-check Cas9
-                if d.kind == "virus" and d.bound:
-                    continue
-
-                if distance(c, d) <= (c.r + d.r + COLLISION_BUFFER):
-                    if d.kind == "junk":
-                        bind_time = d.junk_bind_time if d.junk_bind_time is not None else BIND_TIME_JUNK
-                        c.bind_to(d, sim_time, bind_time, "bound_junk")
-
-                    else:  # virus
-                        p = random.random()
-                        if p <= SUCCESS_PROB:
-                            # IMMEDIATE SUCCESS: no dwell, both disappear
-                            capture_count += 1
-                            d.alive = False
-                            canvas.delete(d.id)
-                            c.alive = False
-                            canvas.delete(c.id)
-                        else:
-                            # FAILED MATCH: dwell for virus_bind_time, then detach
-                            d.bound = True
-                            d.cooldown_until = sim_time + COOLDOWN_VIRUS_FAIL
-                            bind_time = (d.virus_bind_time * TIME_SCALE) if d.virus_bind_time is not None else BIND_TIME_VIRUS
-                            c.bind_to(d, sim_time, bind_time, "bound_virus")
-                        # either way, this Cas9 is done with collisions this step
-                    break
-
-        # prune dead
-        dna_list = [d for d in dna_list if d.alive]
-        cas9_list = [c for c in cas9_list if c.alive]
 
-        sim_time += dt
+class SnapshotWriter(GridWriter):
+    """
+    A GridWriter saved as one whole file by save(f): rewritten every
+    CHECKPOINT_SECONDS while results arrive (through a temporary file, so
+    a reader never sees half of one) and once more on close, so a crash
+    loses at most the last few seconds of rows.
+    """
 
-    if num_virus > 0:
-        kill_density = capture_count / num_virus
-    else:
-        kill_density = 0.0
+    def __init__(self, path, points):
+        super().__init__(path, points)
+        self.saved = time.perf_counter()
+
+    def add(self, junk, cv, stats):
+        super().add(junk, cv, stats)
+        if time.perf_counter() - self.saved >= CHECKPOINT_SECONDS:
+            self.checkpoint()
 
-    return kill_density
+    def checkpoint(self):
+        with open(self.path + ".tmp", "wb") as f:
+            self.save(f)
+        os.replace(self.path + ".tmp", self.path)
+        self.saved = time.perf_counter()
+
+    def close(self):
+        self.checkpoint()
+
+
+class NpzWriter(SnapshotWriter):
+    """One .npz: the axis vectors, axis names and one matrix per field."""
+
+    def save(self, f):
+        np.savez(f, axis_names=np.array(["init_junk", "init_cas9_virus"]),
+                 **self.axes(), **self.grids)
+
+
+class NpyWriter(GridWriter):
+    """
+    One memory-mappable .npy per field (<stem>.<field>.npy) plus
+    <stem>.axes.npz. The matrices are memmaps from the start, so every
+    result is on disk as soon as it arrives and np.load(..., mmap_mode="r")
+    can read a sweep that is still running.
+    """
+
+    def __init__(self, path, points):
+        super().__init__(path, points)
+        self.path = os.path.splitext(path)[0] + ".*.npy"   # for the summary line
+
+    def _make_grids(self, shape):
+        stem = os.path.splitext(self.path)[0]
+        grids = {}
+        for name in GRID_FIELDS:
+            grids[name] = np.lib.format.open_memmap(f"{stem}.{name}.npy", mode="w+",
+                                                    dtype=np.float64, shape=shape)
+            grids[name][:] = np.nan
+        np.savez(f"{stem}.axes.npz", axis_names=np.array(["init_junk", "init_cas9_virus"]),
+                 init_junk=np.array(self.junk_vals), init_cas9_virus=np.array(self.cv_vals))
+        return grids
+
+    def add(self, junk, cv, stats):
+        super().add(junk, cv, stats)
+        for grid in self.grids.values():
+            grid.flush()
+
+    def close(self):
+        for grid in self.grids.values():
+            grid.flush()
+
+
+class MatWriter(SnapshotWriter):
+    """
+    MATLAB v5 .mat with the junk x cv matrices ready for surf():
+
+      load('batch_results.mat');
+      [CAS9, JUNK] = meshgrid(init_cas9_virus, init_junk);
+      surf(CAS9, JUNK, virus_kill_density);
+    """
+
+    def __init__(self, path, points):
+        try:
+            from scipy.io import savemat
+        except ImportError:
+            raise ImportError("--format mat needs scipy installed") from None
+        self.savemat = savemat
+        super().__init__(path, points)
+
+    def save(self, f):
+        self.savemat(f, {**self.axes(), **self.grids})
+
+
+class KineticsWriter(GridWriter):
+    """
+    Mean population curves (--kinetics) as one memory-mapped .npy of
+    shape (junk, cv, sample, field), NaN until a point arrives, with its
+    axes in <stem>.axes.npz, plus the same curves in long format in
+    <stem>.txt (one row per point and sample time) for MATLAB, written on
+    close. The curves are not in the checkpoint log, so a resumed sweep
+    reopens the .npy and keeps the ones of the earlier run.
+    """
+
+    def __init__(self, path, points, times, resume):
+        self.times = times
+        self.resume = resume
+        super().__init__(path, points)
+        self.points = points
+        self.stem = os.path.splitext(path)[0]
+        self.path = self.stem + ".{npy,txt}"     # for the summary line
+
+    def _make_grids(self, shape):
+        stem = os.path.splitext(self.path)[0]
+        shape += (len(self.times), len(POPULATION_FIELDS))
+        if self.resume and os.path.exists(stem + ".npy"):
+            curves = np.lib.format.open_memmap(stem + ".npy", mode="r+")
+            if curves.shape != shape:
+                raise ValueError(f"{stem}.npy holds curves of shape {curves.shape}, expected {shape}")
+        else:
+            curves = np.lib.format.open_memmap(stem + ".npy", mode="w+", dtype=np.float64, shape=shape)
+            curves[:] = np.nan
+        np.savez(stem + ".axes.npz",
+                 axis_names=np.array(["init_junk", "init_cas9_virus", "t", "field"]),
+                 init_junk=np.array(self.junk_vals), init_cas9_virus=np.array(self.cv_vals),
+                 t=self.times, field=np.array(POPULATION_FIELDS))
+        return {"kinetics": curves}
+
+    def add(self, junk, cv, stats):
+        if stats.kinetics is None:      # read back from the log: the .npy has it
+            return
+        curves = self.grids["kinetics"]
+        curves[self.junk_idx[junk], self.cv_idx[cv]] = stats.kinetics
+        curves.flush()
+
+    def close(self):
+        curves = self.grids["kinetics"]
+        curves.flush()
+        with open(self.stem + ".txt", "w") as f:
+            f.write("\t".join(["init_cas9_virus", "init_junk", "t", *POPULATION_FIELDS]) + "\n")
+            for junk, cv in self.points:
+                for t, row in zip(self.times, curves[self.junk_idx[junk], self.cv_idx[cv]]):
+                    f.write(f"{cv}\t{junk}\t{t:g}\t" + "\t".join(f"{v:.6f}" for v in row) + "\n")
+
+
+class ConsoleProgress:
+    """
+    Not a file: prints each PointResult as it arrives with the progress so
+    far, the throughput and an ETA from the average rate since the start.
+    With workers > 1 every line also says which worker (pid) ran the point
+    and how many it has done, close() prints the points per worker and
+    restart() is the on_restart callback of iter_sweep().
+    """
+
+    def __init__(self, total, workers=1):
+        self.total = total
+        self.workers = workers
+        self.done = 0
+        self.per_worker = Counter()
+        self.t0 = time.perf_counter()
+
+    def result(self, r):
+        self.done += 1
+        self.per_worker[r.pid] += 1
+        elapsed = time.perf_counter() - self.t0
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else 0.0
+        worker = f"worker {r.pid}: {self.per_worker[r.pid]:3d} done | " if self.workers > 1 else ""
+        print(f"[{worker}{self.done}/{self.total} | {rate:5.2f} pts/s | "
+              f"ETA {int(eta // 60)}m{int(eta % 60):02d}s] " + describe(r.junk, r.cv, r.stats))
+
+    def restart(self, restarts, left):
+        print(f"\nA worker crashed, restarting the pool "
+              f"({restarts}/{MAX_POOL_RESTARTS}), {left} points left\n")
+
+    def close(self):
+        if self.workers > 1 and self.per_worker:
+            print("\nPoints per worker:")
+            for pid, n in sorted(self.per_worker.items()):
+                print(f"  worker {pid}: {n}")
+
+
+def make_writers(formats, points, with_stats, kinetics=None, resume=False, output=OUTPUT_FILE):
+    """
+    One writer per requested format, all named after `output`, plus a
+    KineticsWriter when the sweep records curves every `kinetics` seconds
+    (resume: keep the curves already on disk).
+    """
+    stem = os.path.splitext(output)[0]
+    writers = []
+    if kinetics:
+        times = PopulationRecorder(kinetics, EXPERIMENT_DURATION).times
+        writers.append(KineticsWriter(stem + "_kinetics.npy", points, times, resume))
+    for fmt in formats:
+        if fmt == "tsv":
+            writers.append(TsvWriter(output, points, with_stats))
+            continue
+        if np is None:
+            raise ImportError(f"--format {fmt} needs numpy installed")
+        if fmt == "npz":
+            writers.append(NpzWriter(stem + ".npz", points))
+        elif fmt == "npy":
+            writers.append(NpyWriter(stem + ".npy", points))
+        elif fmt == "mat":
+            writers.append(MatWriter(stem + ".mat", points))
+    return writers
 
 
 # --------------------
 # BATCH LOOP
 # --------------------
-def main():
-    with open(OUTPUT_FILE, "w") as f:
-        f.write("init_cas9_virus\tinit_junk\tvirus_kill_density\n")
+# one finished grid point, as iter_sweep() yields it
+PointResult = namedtuple("PointResult", "junk cv stats pid seconds")
 
-        # junk DNA: 0 to 300, step 10
-        for junk in range(0, 301, 10):
-            # cas9 = virus: 1 to <90, step 3 => 1,4,7,...,88
-            for cv in range(1, 90, 3):
-                kill_density = run_single_sim(junk, cv, cv)
-                f.write(f"{cv}\t{junk}\t{kill_density:.6f}\n")
-                # optional: progress print
-                print(f"Junk={junk:3d}, Cas9/Virus={cv:2d}, kill_density={kill_density:.3f}")
 
-    print(f"\nAll simulations complete. Results saved to {OUTPUT_FILE}")
+def run_point(junk, cv, engine, seed, cache=None, **rep_opts):
+    """
+    One grid point as a PointResult (with the worker's pid and the wall
+    time it took). Every replicate has its own stream from (seed, junk,
+    cv, replicate), so a point gives the same result whichever worker
+    runs it and in whatever order.
+    """
+    t0 = time.perf_counter()
+    stats = run_replicates(junk, cv, engine, seed=seed, cache=cache, **rep_opts)
+    return PointResult(junk, cv, stats, os.getpid(), time.perf_counter() - t0)
+
+
+def describe(junk, cv, stats):
+    line = f"Junk={junk:3d}, Cas9/Virus={cv:2d}, kill_density={stats.mean:.3f}"
+    if stats.n > 1:
+        line += f" +/- {CI_Z * stats.sem:.3f} (n={stats.n})"
+    return line
+
+
+def iter_sweep(points=None, engine="python", seed=None, workers=1, cache=None,
+               on_restart=None, **rep_opts):
+    """
+    Run grid points and yield one PointResult per point the moment it
+    finishes: in order when serial, in completion order with workers > 1.
+    points defaults to the full sweep_points() grid, rep_opts are
+    run_replicates() options (one replicate per point by default).
+    cache: optional ResultCache, runs already in it are not simulated.
+    on_restart: called as on_restart(restarts, points_left) when a worker
+    crash made the pool restart.
+
+        for r in iter_sweep(engine="numba", seed=1, workers=4):
+            print(r.junk, r.cv, r.stats.mean)
+
+    Pass the results on to any of the writers below (or drain() them);
+    breaking out of the loop early stops the pool.
+    """
+    if points is None:
+        points = sweep_points()
+    if not rep_opts:
+        rep_opts = {"replicates": 1}
+    if workers > 1:
+        yield from _iter_parallel(points, engine, seed, rep_opts, workers, cache, on_restart)
+    else:
+        for junk, cv in points:
+            yield run_point(junk, cv, engine, seed, cache, **rep_opts)
+
+
+def _iter_parallel(points, engine, seed, rep_opts, workers, cache, on_restart=None):
+    """
+    iter_sweep over a process pool. If a worker dies (BrokenProcessPool)
+    the finished points stay yielded, the pool is rebuilt and only the
+    unfinished points are resubmitted.
+    """
+    finished = set()
+    restarts = 0
+
+    while len(finished) < len(points):
+        todo = [i for i in range(len(points)) if i not in finished]
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = {pool.submit(run_point, *points[i], engine, seed, cache, **rep_opts): i
+                       for i in todo}
+            for fut in as_completed(futures):
+                result = fut.result()
+                finished.add(futures[fut])
+                yield result
+
+        except BrokenProcessPool:
+            restarts += 1
+            if restarts > MAX_POOL_RESTARTS:
+                raise
+            if on_restart is not None:
+                on_restart(restarts, len(points) - len(finished))
+        finally:
+            # a consumer that stops early doesn't wait for the rest of the grid
+            pool.shutdown(cancel_futures=True)
+
+
+def drain(results, sinks, progress=None):
+    """
+    Hand every PointResult to every sink (anything with add(junk, cv,
+    stats)), then the whole result to progress.result() if given.
+    """
+    for r in results:
+        for sink in sinks:
+            sink.add(r.junk, r.cv, r.stats)
+        if progress is not None:
+            progress.result(r)
+
+
+def run_adaptive(run_config, done, log_path, formats, workers, merge_only, cache=None):
+    """
+    Adaptive sweep: evaluate the nodes adaptive_sweep() asks for (points
+    already in the log are reused), then write the scattered points to
+    ADAPTIVE_POINTS_FILE and the interpolated full grid to the usual
+    output formats, so the MATLAB script still gets a complete surface.
+    Kinetics curves are not interpolated: only evaluated points have one.
+    """
+    engine, seed, rep_opts = run_config["engine"], run_config["seed"], run_config["rep_opts"]
+    opts = run_config["adaptive"]
+    points = sweep_points()
+    curve_writers = make_writers([], points, True, rep_opts.get("kinetics"), resume=bool(done))
+    log = LogWriter(log_path)
+
+    def evaluate(nodes):
+        todo = [p for p in nodes if p not in done]
+        if todo and merge_only:
+            raise SystemExit(f"{log_path} stops before the adaptive sweep is finished; "
+                             f"complete it with --resume")
+        if todo:
+            print(f"\nRefinement level: {len(todo)} new points "
+                  f"({len(done)} evaluated so far)")
+        progress = ConsoleProgress(len(todo), workers)
+        for r in iter_sweep(todo, engine, seed, workers, cache, progress.restart, **rep_opts):
+            for sink in curve_writers + [log]:
+                sink.add(r.junk, r.cv, r.stats)
+            progress.result(r)
+            # refine on the logged values so a resumed run takes the same path
+            done[(r.junk, r.cv)] = as_logged(r.stats)
+        progress.close()
+        return dict(done)
+
+    try:
+        results, leaves = adaptive_sweep(evaluate, opts["gradient"], opts["ci"], opts["coarse_step"])
+    finally:
+        log.close()
+
+    grid = interpolate_grid(results, leaves)
+
+    scattered = [p for p in points if p in results]
+    scatter_writer = TsvWriter(ADAPTIVE_POINTS_FILE, scattered, with_stats=True)
+    writers = [scatter_writer] + make_writers(formats, points, with_stats=True)
+    for w in writers:
+        for point in w.points if w is scatter_writer else points:
+            w.add(*point, grid[point])
+        w.close()
+    for w in curve_writers:
+        w.close()
+    writers += curve_writers
+
+    print(f"\nAdaptive sweep evaluated {len(results)} of {len(points)} grid points "
+          f"({len(leaves)} leaf cells). Results saved to {', '.join(w.path for w in writers)}")
+
+
+def report_cache(cache, cached_before):
+    """Evict down to the size limit and print how the cache changed."""
+    evicted = cache.evict()
+    print(f"{cache.path}: {len(cache)} runs cached ({len(cache) - cached_before:+d} this sweep, "
+          f"at most {cache.max_entries} kept)"
+          + (f", {evicted} least recently used evicted at the end" if evicted else ""))
+    cache.close()
+
+
+def profile_point(junk, cv, replicates, seed):
+    """
+    Profile `replicates` python-engine runs of one grid point and print a
+    JSON summary per run (same seeds as the sweep, so a slow point of a
+    sweep can be re-run here exactly).
+    """
+    for r in range(replicates):
+        profiler = PhaseProfiler()
+        t0 = time.perf_counter()
+        density = run_single_sim(junk, cv, cv, seed=task_seed(seed, junk, cv, r), profiler=profiler)
+        summary = {"init_junk": junk, "init_cas9_virus": cv, "replicate": r, "seed": seed,
+                   "virus_kill_density": density,
+                   "wall_seconds": round(time.perf_counter() - t0, 6)}
+        summary.update(profiler.summary())
+        print(json.dumps(summary))
+
+
+# --------------------
+# DT VALIDATION
+# --------------------
+# points checked by --validate-dt: empty box, mid grid, crowded, junk-heavy
+VALIDATE_POINTS = ((0, 10), (100, 40), (300, 88), (300, 10))
+VALIDATE_REPLICATES = 40    # used when --replicates is left at 1
+
+
+def timed_replicates(junk, cv, replicates, seed, sim_opts=None):
+    t0 = time.perf_counter()
+    values = draw_replicates(junk, cv, "python", 0, replicates, seed, sim_opts)
+    return summarize(values, cv), time.perf_counter() - t0
+
+
+def validate_dt(factors, replicates, seed):
+    """
+    Compare kill densities at dt = k * base against the base dt, with and
+    without swept collisions, on VALIDATE_POINTS. z is the difference in
+    units of the combined standard error; |z| > CI_Z is flagged.
+    Returns the number of flagged (mode, factor, point) rows.
+    """
+    flagged = 0
+    print(f"{'point':<12}{'mode':<10}{'dt x':>5}{'kill_density':>20}{'z':>7}{'speedup':>9}")
+    for junk, cv in VALIDATE_POINTS:
+        base, base_wall = timed_replicates(junk, cv, replicates, seed)
+        print(f"{f'{junk},{cv}':<12}{'base':<10}{1:>5}"
+              f"{base.mean:>12.3f} +/- {CI_Z * base.sem:.3f}")
+        for ccd in (False, True):
+            for k in factors:
+                stats, wall = timed_replicates(junk, cv, replicates, seed,
+                                               {"dt_scale": k, "ccd": ccd})
+                se = math.hypot(base.sem, stats.sem)
+                z = (stats.mean - base.mean) / se if se > 0 else 0.0
+                flag = ""
+                if abs(z) > CI_Z:
+                    flag = "  <-- differs"
+                    flagged += 1
+                print(f"{'':<12}{'swept' if ccd else 'discrete':<10}{k:>5g}"
+                      f"{stats.mean:>12.3f} +/- {CI_Z * stats.sem:.3f}{z:>7.2f}"
+                      f"{base_wall / wall:>8.1f}x{flag}")
+    return flagged
+
+
+# --------------------
+# MEAN-FIELD KINETICS
+# --------------------
+# --meanfield: the expected populations of the particle model, stepped tick
+# by tick with its rules instead of simulated particle by particle, for
+# the whole grid at once; --calibrate-meanfield compares it with
+# replicated particle runs to show where it holds up
+MEANFIELD_FILE = "meanfield_results.txt"
+MEANFIELD_TOLERANCE = 0.05    # |mean-field - particle| kill density that counts as off
+CALIBRATION_STEP = 5          # grid steps between calibrated levels, on both axes
+CALIBRATION_REPLICATES = 20   # used when --replicates is left at 1
+SEARCH_TICKS = 40             # ticks of searching with their own area (search_areas)
+SEARCH_WALKS = 1500           # relative walks behind search_areas() ...
+SEARCH_POINTS = 16            # ... and probe points per walk
+
+
+@lru_cache(maxsize=None)
+def search_areas(config, ticks=SEARCH_TICKS, walks=SEARCH_WALKS, points=SEARCH_POINTS):
+    """
+    Mean area (px^2) in which a free Cas9 can find new DNA, by ticks
+    since it started looking: [0] is its whole contact disc (it has not
+    looked before: t = 0 or just released), [k] the part of the disc that
+    was in none of its discs of the k ticks before, relative to a DNA,
+    the last entry standing for all later ticks. Both random walks
+    persist and turn back now and then, so this shrinks with k.
+    Estimated from `walks` relative walks (fixed seed, so the same
+    config always gets the same areas) with `points` probe points each.
+    """
+    rng = np.random.default_rng(0)
+    dirs = np.array(DIRECTIONS, dtype=np.float64)
+    r = config.contact_distance
+    cas9_dir = dirs[rng.integers(len(dirs), size=walks)]
+    dna_dir = dirs[rng.integers(len(dirs), size=walks)]
+    path = np.zeros((ticks, walks, 2))      # the Cas9 seen from its DNA
+    for k in range(1, ticks):
+        path[k] = path[k - 1] + config.cas9_speed * (cas9_dir - 0.3 * dna_dir)
+        for d, p_turn in ((cas9_dir, config.cas9_turn_prob), (dna_dir, config.dna_turn_prob)):
+            turn = rng.random(walks) < p_turn
+            d[turn] = dirs[rng.integers(len(dirs), size=turn.sum())]
+
+    # probe points spread evenly over the contact disc
+    rho = r * np.sqrt(rng.random((walks, points)))
+    theta = 2 * np.pi * rng.random((walks, points))
+    probes = np.stack([rho * np.cos(theta), rho * np.sin(theta)], axis=-1)
+
+    # only earlier discs that overlap a disc can cover its probes; all
+    # (disc, earlier disc) pairs at once
+    now, before = np.tril_indices(ticks, -1)
+    gap = path[now] - path[before]
+    pair, walk = np.nonzero((gap ** 2).sum(axis=-1) < 4 * r * r)
+    now, gap = now[pair], gap[pair, walk]
+    x = probes[walk, :, 0] + gap[:, 0, None]
+    y = probes[walk, :, 1] + gap[:, 1, None]
+    covered = np.zeros((ticks, walks, points), dtype=bool)
+    rows, cols = np.nonzero(x * x + y * y <= r * r)
+    covered[now[rows], walk[rows], cols] = True
+    return math.pi * r * r * (1 - covered.mean(axis=(1, 2)))
+
+
+def ticks_until(seconds, dt):
+    """Ticks after a contact at which something `seconds` later comes due (at least 1)."""
+    return np.maximum(1, np.ceil(np.asarray(seconds) / dt - 1e-9)).astype(np.intp)
+
+
+def released_fresh(dwell_ticks, config):
+    """
+    Whether a Cas9 held for dwell_ticks comes back to unsearched ground
+    (looks at its whole contact disc again): only if its DNA had the time
+    to cross the disc meanwhile. After a shorter hold it is released next
+    to where it searched last and goes on from there.
+    """
+    crossing = 2 * config.contact_distance / (0.3 * config.cas9_speed)
+    return np.asarray(dwell_ticks) >= crossing
+
+
+def meanfield_surface(points, config=None, duration=EXPERIMENT_DURATION):
+    """
+    Mean-field kill density of every (junk, cv) in points, as an array.
+
+    Steps the expected counts of eligible junk and virus (per mismatch
+    class, each with its own dwell time), free Cas9 (by ticks since they
+    started looking) and kills at the particle model's tick. A free Cas9
+    meets Poisson(search area x eligible DNA density) DNA, see
+    search_areas(), and takes one of them, from each class in proportion
+    to its eligible count. A virus contact kills with success_prob;
+    otherwise the Cas9 is back after the virus's dwell and the virus
+    after its dwell or cooldown_virus_fail, whichever is longer. A junk
+    contact holds the Cas9 for the junk's dwell and the junk for that
+    plus cooldown_junk. Both come back on exactly the tick they would in
+    Simulation.
+
+    Left out: the walls, junk taking a second Cas9 while it is bound, and
+    the luck of small populations (a single Cas9 and virus either meet or
+    don't).
+    """
+    cfg = config if config is not None else DEFAULT_CONFIG
+    dt = UPDATE_INTERVAL_MS / 1000.0
+    ticks = math.ceil(duration / dt - 1e-9)
+    cv0 = np.array([cv for _, cv in points], dtype=np.float64)
+    probs = np.array(JUNK_PROBS)[:, None]
+    classes = np.arange(len(JUNK_PROBS))
+
+    junk_sampler, virus_sampler = cfg.samplers()
+    junk_dwell = ticks_until(junk_sampler.times_np, dt)
+    junk_back = junk_dwell + ticks_until(cfg.cooldown_junk, dt)
+    virus_dwell = ticks_until(virus_sampler.times_np * cfg.time_scale, dt)
+    virus_back = np.maximum(virus_dwell, ticks_until(cfg.cooldown_virus_fail, dt))
+    areas = search_areas(cfg)[:, None]
+    # the free rows (0: fresh, 1: next to where it looked) each class comes back to
+    junk_to = np.where(released_fresh(junk_dwell, cfg), [[1], [0]], [[0], [1]])
+    virus_to = np.where(released_fresh(virus_dwell, cfg), [[1], [0]], [[0], [1]])
+    box = (cfg.width - 2 * cfg.dna_radius) * (cfg.height - 2 * cfg.dna_radius)
+
+    junk = probs * np.array([junk for junk, _ in points], dtype=np.float64)
+    virus = probs * cv0
+    free = np.zeros((len(areas), len(points)))     # free Cas9 by ticks spent looking
+    free[0] = cv0
+    kills = np.zeros_like(cv0)
+    # contacts of each tick and class, to bring them back later; row
+    # pad + k is tick k, the rows before it stay 0 (nothing comes back)
+    pad = int(max(junk_back.max(), virus_back.max()))
+    junk_hits = np.zeros((pad + ticks,) + junk.shape)
+    virus_fails = np.zeros((pad + ticks,) + virus.shape)
+
+    for k in range(pad, pad + ticks):
+        for hits, dwell, to, back, pool in (
+                (junk_hits, junk_dwell, junk_to, junk_back, junk),
+                (virus_fails, virus_dwell, virus_to, virus_back, virus)):
+            free[:2] += to @ hits[k - dwell, classes]
+            pool += hits[k - back, classes]
+
+        eligible = junk.sum(axis=0) + virus.sum(axis=0)
+        # minus the chance to meet any DNA this tick, by ticks spent looking
+        missed = np.expm1(-areas * (eligible / box))
+        contacts = -np.einsum("ij,ij->j", free, missed)
+        # no more contacts than there is eligible DNA
+        scale = np.divide(np.minimum(contacts, eligible), contacts,
+                          out=np.zeros_like(contacts), where=contacts > 0)
+        share = np.divide(contacts * scale, eligible, out=np.zeros_like(contacts),
+                          where=eligible > 0)
+        junk_hits[k] = junk * share
+        virus_met = virus * share
+        junk -= junk_hits[k]
+        virus -= virus_met
+        kills += cfg.success_prob * virus_met.sum(axis=0)
+        virus_fails[k] = (1 - cfg.success_prob) * virus_met
+
+        # the ones that found nothing look one tick longer
+        missed *= scale
+        missed += 1
+        free *= missed
+        free[-1] += free[-2]
+        free[1:-1] = free[:-2].copy()
+        free[0] = 0.0
+
+    return np.divide(kills, cv0, out=np.zeros_like(kills), where=cv0 > 0)
+
+
+def write_meanfield(formats, config=None):
+    """--meanfield: meanfield_surface() of the whole grid into the output formats."""
+    points = sweep_points()
+    t0 = time.perf_counter()
+    densities = meanfield_surface(points, config)
+    seconds = time.perf_counter() - t0
+    writers = make_writers(formats, points, with_stats=False, output=MEANFIELD_FILE)
+    for point, density in zip(points, densities):
+        for w in writers:
+            w.add(*point, summarize([float(density)]))
+    for w in writers:
+        w.close()
+    print(f"Mean-field surface of {len(points)} points in {seconds:.3f} s. "
+          f"Results saved to {', '.join(w.path for w in writers)}")
+
+
+def calibration_points():
+    """Every CALIBRATION_STEP-th junk and cv level of the sweep grid."""
+    return [(junk, cv) for junk in SWEEP_JUNK[::CALIBRATION_STEP]
+            for cv in SWEEP_CV[::CALIBRATION_STEP]]
+
+
+def calibrate_meanfield(engine, replicates, seed, workers=1, cache=None, config=None):
+    """
+    Compare meanfield_surface() with `replicates` particle runs on
+    calibration_points(). z is the difference in units of the particle
+    standard error; a point is flagged when the difference is both above
+    MEANFIELD_TOLERANCE and beyond CI_Z standard errors (big enough to
+    matter and not noise). Ends with a junk x cv map of the flags.
+    Returns the number of flagged points.
+    """
+    points = calibration_points()
+    meanfield = dict(zip(points, meanfield_surface(points, config)))
+    particle = {}
+    for r in iter_sweep(points, engine, seed, workers, cache, replicates=replicates, config=config):
+        particle[(r.junk, r.cv)] = r.stats
+
+    flags = {}
+    print(f"{'point':<12}{'particle':>20}{'mean-field':>12}{'diff':>8}{'z':>8}")
+    for junk, cv in points:
+        stats, value = particle[(junk, cv)], meanfield[(junk, cv)]
+        diff = value - stats.mean
+        if stats.sem > 0:
+            z = diff / stats.sem
+        else:
+            z = 0.0 if diff == 0 else math.copysign(math.inf, diff)
+        flags[(junk, cv)] = abs(diff) > MEANFIELD_TOLERANCE and abs(z) > CI_Z
+        print(f"{f'{junk},{cv}':<12}{stats.mean:>12.3f} +/- {CI_Z * stats.sem:.3f}"
+              f"{value:>12.3f}{diff:>+8.3f}{z:>8.2f}"
+              + ("  <-- off" if flags[(junk, cv)] else ""))
+
+    diffs = np.array([meanfield[p] - particle[p].mean for p in points])
+    worst = points[int(np.argmax(np.abs(diffs)))]
+    flagged = sum(flags.values())
+    print(f"\nRMS difference {np.sqrt(np.mean(diffs ** 2)):.3f}, largest "
+          f"{meanfield[worst] - particle[worst].mean:+.3f} at junk={worst[0]}, cv={worst[1]}")
+    print(f"{flagged} of {len(points)} points off by more than {MEANFIELD_TOLERANCE:g} "
+          f"(and {CI_Z:g} standard errors)\n")
+    cvs = SWEEP_CV[::CALIBRATION_STEP]
+    print(f"{'junk / cv':>10}" + "".join(f"{cv:>4}" for cv in cvs))
+    for junk in SWEEP_JUNK[::CALIBRATION_STEP]:
+        print(f"{junk:>10}" + "".join(f"{'x' if flags[(junk, cv)] else '.':>4}" for cv in cvs))
+    return flagged
+
+
+# --------------------
+# GILLESPIE ENGINE (well mixed, event driven)
+# --------------------
+# engine = "ssa": no positions at all, just the counts, with the contact
+# rate of the mean-field model (the walks enter only through
+# search_areas()). Its cost grows with the number of contacts and unbinds,
+# not with ticks x particles, so many replicates stay cheap and keep the
+# run-to-run spread that --meanfield averages away.
+
+# scheduled events, in the order they apply when due at the same time
+RELEASE_JUNK, RELEASE_VIRUS, JUNK_BACK, VIRUS_BACK = range(4)
+
+
+class WellMixedSim:
+    """
+    One run of the well-mixed model: Gillespie's direct method for the
+    contacts, with unbinds and cooldown ends as scheduled events at fixed
+    delays (a delay SSA). Every free Cas9 meets every eligible DNA at rate
+    search area / (box x tick), the steady search area of search_areas();
+    a Cas9 that starts out or comes back onto unsearched ground (see
+    released_fresh) first looks at its whole disc at once. The contact
+    outcomes, the dwell time of each DNA (drawn from the config's
+    samplers like create_dna does, rounded up to whole ticks as
+    Simulation releases them) and the cooldowns follow Simulation.contact().
+
+    Has sim_time and population() like Simulation, so a PopulationRecorder
+    can sample it. profiler: optional PhaseProfiler; the loop counts as
+    "events", ticks are the base ticks of sim time covered.
+    """
+
+    def __init__(self, num_junk, num_virus, num_cas9, rng, config=None, profiler=None,
+                 recorder=None):
+        cfg = config if config is not None else DEFAULT_CONFIG
+        self.config = cfg
+        self.rng = rng
+        self.profiler = profiler
+        self.recorder = recorder
+        self.num_virus = num_virus
+        self.num_junk = num_junk
+        self.dt = UPDATE_INTERVAL_MS / 1000.0
+
+        junk_sampler, virus_sampler = cfg.samplers()
+        junk_ticks = ticks_until(junk_sampler.times_np, self.dt)
+        virus_ticks = ticks_until(virus_sampler.times_np * cfg.time_scale, self.dt)
+        # eligible DNA as their dwell in ticks (one entry per molecule),
+        # drawn in the same order as create_dna
+        to_junk = dict(zip(junk_sampler.times, junk_ticks.tolist()))
+        to_virus = dict(zip(virus_sampler.times, virus_ticks.tolist()))
+        self.junk = [to_junk[t] for t in junk_sampler.draw(rng, num_junk)]
+        self.virus = [to_virus[t] for t in virus_sampler.draw(rng, num_virus)]
+        self.fresh = dict(zip(junk_ticks.tolist() + virus_ticks.tolist(),
+                              released_fresh(np.concatenate([junk_ticks, virus_ticks]), cfg).tolist()))
+        self.junk_cooldown = int(ticks_until(cfg.cooldown_junk, self.dt))
+        self.virus_cooldown = int(ticks_until(cfg.cooldown_virus_fail, self.dt))
+
+        areas = search_areas(cfg)
+        box = (cfg.width - 2 * cfg.dna_radius) * (cfg.height - 2 * cfg.dna_radius)
+        self.disc = areas[0] / box             # whole-disc look, per eligible DNA
+        self.rate = areas[-1] / (box * self.dt)   # per (free Cas9, eligible DNA) pair
+
+        self.sim_time = 0.0
+        self.events = []            # heap of (time, kind, dwell ticks)
+        self.free = num_cas9
+        self.junk_bound = 0
+        self.virus_bound = 0
+        self.capture_count = 0
+        self.virus_left = num_virus
+        if recorder is not None:
+            recorder.sample(self)
+        for _ in range(num_cas9):
+            self.look()
+
+    def population(self):
+        """(live virus, live junk, free Cas9, junk-bound Cas9, virus-bound Cas9)."""
+        return self.virus_left, self.num_junk, self.free, self.junk_bound, self.virus_bound
+
+    def kill_density(self):
+        """kills / initial_virus (0 when there was no virus)."""
+        return self.capture_count / self.num_virus if self.num_virus > 0 else 0.0
+
+    def look(self):
+        """A free Cas9 on unsearched ground checks its whole contact disc at once."""
+        eligible = len(self.junk) + len(self.virus)
+        if eligible and self.rng.random() >= math.exp(-self.disc * eligible):
+            self.contact()
+
+    def contact(self):
+        """A free Cas9 meets an eligible DNA, picked uniformly: bind, or cut a virus."""
+        rng, prof = self.rng, self.profiler
+        pick = rng.randrange(len(self.junk) + len(self.virus))
+        self.free -= 1
+        if pick < len(self.junk):
+            pool, dwell = self.junk, self.junk[pick]
+            pool[pick] = pool[-1]
+            pool.pop()
+            heapq.heappush(self.events, (self.sim_time + dwell * self.dt, RELEASE_JUNK, dwell))
+            heapq.heappush(self.events, (self.sim_time + (dwell + self.junk_cooldown) * self.dt,
+                                         JUNK_BACK, dwell))
+            self.junk_bound += 1
+            if prof is not None:
+                prof.counts["binds"] += 1
+            return
+        pick -= len(self.junk)
+        pool, dwell = self.virus, self.virus[pick]
+        pool[pick] = pool[-1]
+        pool.pop()
+        if rng.random() <= self.config.success_prob:
+            # cut: both the virus and the Cas9 are gone
+            self.capture_count += 1
+            self.virus_left -= 1
+            if prof is not None:
+                prof.counts["kills"] += 1
+            return
+        heapq.heappush(self.events, (self.sim_time + dwell * self.dt, RELEASE_VIRUS, dwell))
+        heapq.heappush(self.events, (self.sim_time + max(dwell, self.virus_cooldown) * self.dt,
+                                     VIRUS_BACK, dwell))
+        self.virus_bound += 1
+        if prof is not None:
+            prof.counts["binds"] += 1
+
+    def finished(self):
+        """Nothing left that could change the kill count."""
+        return self.virus_left == 0 or self.free + self.junk_bound + self.virus_bound == 0
+
+    def run(self, duration):
+        """Jump from event to event until `duration`; returns the kill density."""
+        prof = self.profiler
+        t0 = time.perf_counter() if prof is not None else 0.0
+        rng, events, rec = self.rng, self.events, self.recorder
+        while not self.finished():
+            eligible = len(self.junk) + len(self.virus)
+            propensity = self.rate * self.free * eligible
+            t_contact = self.sim_time + rng.expovariate(propensity) if propensity > 0 else math.inf
+            t_event = events[0][0] if events else math.inf
+            t = min(t_contact, t_event)
+            if t >= duration:
+                break
+            if rec is not None and t >= rec.next_time:
+                # the rows before t still see the state from before this event
+                self.sim_time = t - 2e-9
+                rec.sample(self)
+            self.sim_time = t
+            if t_contact < t_event:
+                self.contact()
+                continue
+            # a scheduled event comes first; the contact clock is memoryless
+            _, kind, dwell = heapq.heappop(events)
+            if kind == JUNK_BACK:
+                self.junk.append(dwell)
+            elif kind == VIRUS_BACK:
+                self.virus.append(dwell)
+            else:
+                if kind == RELEASE_JUNK:
+                    self.junk_bound -= 1
+                else:
+                    self.virus_bound -= 1
+                self.free += 1
+                if self.fresh[dwell]:
+                    self.look()
+
+        if rec is not None:
+            rec.finish(self)            # the rows left are all past the last event
+        if prof is not None:
+            prof.seconds["events"] += time.perf_counter() - t0
+            prof.counts["ticks"] += math.ceil(duration / self.dt - 1e-9)
+        return self.kill_density()
+
+
+def run_single_sim_ssa(num_junk, num_virus, num_cas9, seed=None, profiler=None,
+                       duration=EXPERIMENT_DURATION, recorder=None, config=None):
+    """Same contract as run_single_sim, on the well-mixed Gillespie engine."""
+    if np is None:
+        raise ImportError("the ssa engine needs numpy installed")
+    sim = WellMixedSim(num_junk, num_virus, num_cas9, python_rng(seed), config=config,
+                       profiler=profiler, recorder=recorder)
+    return sim.run(duration)
+
+
+def positive_int(text):
+    """argparse type: a whole number >= 1."""
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a whole number >= 1, got {text!r}")
+    return value
+
+
+def non_negative_int(text):
+    """argparse type: a whole number >= 0."""
+    try:
+        value = int(text)
+    except ValueError:
+        value = -1
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"expected a whole number >= 0, got {text!r}")
+    return value
+
+
+def positive_float(text):
+    """argparse type: a number > 0."""
+    try:
+        value = float(text)
+    except ValueError:
+        value = math.nan
+    if not value > 0 or math.isinf(value):
+        raise argparse.ArgumentTypeError(f"expected a number > 0, got {text!r}")
+    return value
+
+
+def config_item(text):
+    """argparse type of --set: NAME=VALUE -> (NAME, float VALUE), NAME a SimConfig field."""
+    name, sep, value = text.partition("=")
+    if not sep or name not in SimConfig._fields:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, NAME one of "
+                                         f"{', '.join(SimConfig._fields)}; got {text!r}")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{name}: expected a number, got {value!r}") from None
+
+
+def parse_overrides(items):
+    """{field: value} from the --set items (see config_item)."""
+    return dict(items or ())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Batch Cas9 parameter sweep (no GUI)")
+    parser.add_argument("--engine", choices=ENGINES, default="python",
+                        help="simulation engine for run_single_sim")
+    parser.add_argument("--workers", type=positive_int, default=1,
+                        help="number of worker processes (1 = run serially)")
+    parser.add_argument("--replicates", type=positive_int, default=1,
+                        help="runs per grid point (adds sem / CI columns when > 1)")
+    parser.add_argument("--ci-target", type=positive_float, default=None,
+                        help="adaptive mode: add replicates until the CI half-width is below this")
+    parser.add_argument("--min-replicates", type=positive_int, default=MIN_REPLICATES,
+                        help="adaptive mode: replicates before the first stopping check")
+    parser.add_argument("--max-replicates", type=positive_int, default=MAX_REPLICATES,
+                        help="adaptive mode: hard cap on replicates per point")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed (random if not given, always recorded in the log)")
+    parser.add_argument("--log", default=LOG_FILE,
+                        help="append-only checkpoint log")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the sweep in --log, skipping points it already has")
+    parser.add_argument("--merge-only", action="store_true",
+                        help="just rebuild the output files from --log")
+    parser.add_argument("--shard", default=None, metavar="I/N",
+                        help="run only shard I of N (I from 0) of the grid into its own log, "
+                             "e.g. batch_results.shard0of4.log; needs --seed, the same on every shard")
+    parser.add_argument("--merge-shards", nargs="*", default=None, metavar="LOG",
+                        help="check the shard logs (all <log>.shard*of*.log by default) and join "
+                             "them into --log, then write the output files")
+    parser.add_argument("--format", default="tsv",
+                        help=f"comma-separated output formats from {','.join(OUTPUT_FORMATS)}")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="refine a coarse grid only where the surface changes; the rest "
+                             "of the output grid is interpolated")
+    parser.add_argument("--refine-gradient", type=float, default=ADAPTIVE_GRADIENT,
+                        help="adaptive: refine cells whose corner densities differ by more than this")
+    parser.add_argument("--refine-ci", type=float, default=ADAPTIVE_CI,
+                        help="adaptive: refine cells with a corner CI half-width above this")
+    parser.add_argument("--coarse-step", type=positive_int, default=ADAPTIVE_COARSE_STEP,
+                        help="adaptive: grid steps between the starting nodes")
+    parser.add_argument("--profile", type=int, nargs=2, metavar=("JUNK", "CV"), default=None,
+                        help="instead of sweeping, profile --replicates runs of one point "
+                             "and print a JSON summary per run")
+    parser.add_argument("--dt-scale", type=positive_float, default=1,
+                        help="python engine: tick length in multiples of UPDATE_INTERVAL_MS "
+                             "(use with --ccd above 1)")
+    parser.add_argument("--ccd", action="store_true",
+                        help="python engine: swept collisions, still looked for on the base tick "
+                             "grid along each long tick; measured 1.4-3.8x faster than the base "
+                             "tick at --dt-scale 2-10, but slower (0.5-0.7x) on the smallest "
+                             "populations")
+    parser.add_argument("--kinetics", type=positive_float, default=None, metavar="SECONDS",
+                        help="record the population every SECONDS of sim time and write the mean "
+                             "curves per point to <output>_kinetics.npy / .txt (not numpy)")
+    parser.add_argument("--set", action="append", type=config_item, metavar="NAME=VALUE",
+                        help="change a model parameter for this sweep (a SimConfig field, "
+                             "e.g. success_prob=0.6); repeat for several")
+    parser.add_argument("--cache", nargs="?", const=CACHE_FILE, default=None, metavar="PATH",
+                        help=f"reuse runs from (and add new ones to) a result cache, {CACHE_FILE} "
+                             f"by default; only hits for the same --seed")
+    parser.add_argument("--cache-size", type=non_negative_int, default=CACHE_MAX_ENTRIES,
+                        help="runs kept in the cache, the least recently used go first")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="empty the --cache file before running (needs --cache)")
+    parser.add_argument("--meanfield", action="store_true",
+                        help=f"instead of sweeping, write the mean-field kill density surface to "
+                             f"{MEANFIELD_FILE} (and the other --format files) without simulating "
+                             f"particles; prints how long it took")
+    parser.add_argument("--calibrate-meanfield", action="store_true",
+                        help="compare the mean-field model with --replicates particle runs "
+                             "(--engine) on a coarse grid and show where it is off")
+    parser.add_argument("--validate-dt", default=None, metavar="FACTORS",
+                        help="instead of sweeping, compare comma-separated dt factors (e.g. "
+                             "2,5,10) with and without --ccd against the base dt")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.clear_cache and not args.cache:
+        raise SystemExit("--clear-cache needs --cache (the cache file to empty)")
+
+    if args.profile is not None:
+        seed = args.seed if args.seed is not None else secrets.randbits(63)
+        profile_point(*args.profile, args.replicates, seed)
+        return
+
+    if args.validate_dt is not None:
+        seed = args.seed if args.seed is not None else secrets.randbits(63)
+        factors = [float(k) for k in args.validate_dt.split(",")]
+        replicates = args.replicates if args.replicates > 1 else VALIDATE_REPLICATES
+        print(f"{replicates} replicates per row (seed {seed})\n")
+        flagged = validate_dt(factors, replicates, seed)
+        print(f"\n{flagged} row(s) outside the {CI_Z:g} sigma band")
+        return
+
+    formats = args.format.split(",")
+    for fmt in formats:
+        if fmt not in OUTPUT_FORMATS:
+            raise SystemExit(f"unknown --format {fmt!r}, expected {', '.join(OUTPUT_FORMATS)}")
+
+    if args.meanfield or args.calibrate_meanfield:
+        if np is None:
+            raise SystemExit("the mean-field model needs numpy installed")
+        config = make_config(parse_overrides(args.set))
+        if args.meanfield:
+            write_meanfield(formats, config)
+            return
+        seed = args.seed if args.seed is not None else secrets.randbits(63)
+        replicates = args.replicates if args.replicates > 1 else CALIBRATION_REPLICATES
+        print(f"{len(calibration_points())} points, {replicates} {args.engine} replicates each "
+              f"(seed {seed})\n")
+        if args.engine == "numba":
+            prepare_numba()
+        cache = ResultCache(args.cache, args.cache_size) if args.cache else None
+        calibrate_meanfield(args.engine, replicates, seed, args.workers, cache, config)
+        if cache is not None:
+            cache.close()
+        return
+
+    points = sweep_points()
+
+    log_path = args.log
+    merge_only = args.merge_only or args.merge_shards is not None
+    if args.shard is not None:
+        if args.merge_shards is not None:
+            raise SystemExit("--merge-shards joins all the shards, leave out --shard")
+        shard = parse_shard(args.shard)
+        log_path = shard_log_path(args.log, *shard)
+
+    if args.merge_shards is not None:
+        paths = args.merge_shards or sorted(glob.glob(shard_log_path(args.log, "*", "*")))
+        config, done = merge_shards(args.log, paths)
+        run_config = config["run"]
+    elif args.resume or args.merge_only:
+        # the run settings come from the log, not the command line
+        config, done = read_log(log_path)
+        run_config = config["run"]
+        if not same_model(config["model"], make_config(run_config["rep_opts"].get("config"))):
+            raise SystemExit(f"The model constants differ from the ones {log_path} was run with; "
+                             f"start a new sweep instead of resuming it.")
+        trim_partial_line(log_path)
+        if "shard" in run_config:
+            points = shard_points(points, *run_config["shard"])
+        print(f"{log_path}: {len(done)} of {len(points)} points already done "
+              f"(seed {run_config['seed']})")
+    else:
+        if args.ci_target is not None:
+            rep_opts = dict(ci_target=args.ci_target,
+                            min_replicates=args.min_replicates,
+                            max_replicates=args.max_replicates)
+        else:
+            rep_opts = dict(replicates=args.replicates)
+        if args.dt_scale != 1 or args.ccd:
+            if args.engine != "python":
+                raise SystemExit("--dt-scale / --ccd need --engine python")
+            rep_opts["sim_opts"] = {"dt_scale": args.dt_scale, "ccd": args.ccd}
+        if args.kinetics is not None:
+            if args.engine == "numpy":
+                raise SystemExit("--kinetics needs --engine python, numba or ssa")
+            rep_opts["kinetics"] = args.kinetics
+        overrides = parse_overrides(args.set)
+        if overrides:
+            rep_opts["config"] = overrides
+        seed = args.seed if args.seed is not None else secrets.randbits(63)
+        run_config = {"engine": args.engine, "seed": seed, "rep_opts": rep_opts}
+        if args.adaptive:
+            run_config["adaptive"] = {"gradient": args.refine_gradient, "ci": args.refine_ci,
+                                      "coarse_step": args.coarse_step}
+        if args.shard is not None:
+            if args.seed is None:
+                raise SystemExit("--shard needs --seed, the same one on every shard")
+            if args.adaptive or args.kinetics is not None:
+                raise SystemExit("--shard splits the plain grid sweep; it can't be combined "
+                                 "with --adaptive or --kinetics")
+            run_config["shard"] = list(shard)
+            points = shard_points(points, *shard)
+        start_log(log_path, run_config)
+        done = {}
+
+    cache = None
+    if args.cache:
+        cache = ResultCache(args.cache, args.cache_size)
+        if args.clear_cache:
+            cache.clear()
+        cached_before = len(cache)
+
+    if "adaptive" in run_config:
+        if run_config["engine"] == "numba" and not merge_only:
+            prepare_numba()
+        run_adaptive(run_config, done, log_path, formats, args.workers, merge_only, cache)
+        if cache is not None:
+            report_cache(cache, cached_before)
+        return
+
+    engine, seed, rep_opts = run_config["engine"], run_config["seed"], run_config["rep_opts"]
+    todo = [p for p in points if p not in done]
+    if engine == "numba" and todo and not merge_only:
+        prepare_numba()
+    if "shard" in run_config:
+        # a shard only fills its log, the output files come from --merge-shards
+        formats = []
+        print(f"Shard {run_config['shard'][0]}/{run_config['shard'][1]} of sweep "
+              f"{sweep_hash(run_model(run_config), run_config)}: {len(points)} points")
+
+    # keep the plain 3-column file when there is only one run per point
+    with_stats = "ci_target" in rep_opts or rep_opts["replicates"] > 1
+    writers = make_writers(formats, points, with_stats, rep_opts.get("kinetics"), resume=bool(done))
+
+    # points already in the log go to the writers first, new ones as they finish
+    for point in points:
+        if point in done:
+            for w in writers:
+                w.add(*point, done[point])
+
+    if todo and not merge_only:
+        log = LogWriter(log_path)
+        try:
+            # the log last: a point it has must already be in the kinetics .npy
+            progress = ConsoleProgress(len(todo), args.workers)
+            drain(iter_sweep(todo, engine, seed, args.workers, cache, progress.restart, **rep_opts),
+                  writers + [log], progress)
+        finally:
+            log.close()
+        progress.close()
+
+    for w in writers:
+        w.close()
+
+    if "shard" in run_config:
+        print(f"\nShard complete, results in {log_path}; once every shard is done, join them "
+              f"with --merge-shards")
+    else:
+        print(f"\nAll simulations complete. Results saved to {', '.join(w.path for w in writers)}")
+    if cache is not None:
+        report_cache(cache, cached_before)
 
 
 if __name__ == "__main__":
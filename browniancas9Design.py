@@ -0,0 +1,318 @@
+# PHYS4251/6250
+# Group 9
+# Maxwell Hadaway, Kenechukwu Aniedobe, Michael Olatunji
+# Multi-parameter sweeps (no GUI): any SimConfig field plus the populations,
+# laid out as a full-factorial, Latin-hypercube or Sobol design
+#
+#   python browniancas9Design.py --vary success_prob=0.4:1 --vary cooldown_junk=0.5:5 \
+#       --design lhs --samples 64 --replicates 5 --engine numba --workers 4
+#   python browniancas9Design.py --vary cas9_speed=10,20,30 --vary junk=0:300:4 --design factorial
+#   python browniancas9Design.py --resume
+#
+# Every design point becomes one row of design_results.txt (its parameters,
+# then the kill density stats) as soon as it finishes, in whatever order;
+# the index column is its place in the design.
+
+import argparse
+import itertools
+import json
+import os
+import secrets
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+try:
+    import numpy as np
+except ImportError:       # only needed for the lhs / sobol designs
+    np = None
+
+from browniancas9Core import SimConfig
+from browniancas9Datamine import (
+    CACHE_FILE, CACHE_MAX_ENTRIES, ENGINES, ResultCache, config_item, make_config, model_config,
+    non_negative_int, parse_overrides, positive_int, prepare_numba, report_cache, run_replicates,
+    same_model, trim_partial_line,
+)
+
+# --------------------
+# CONFIG
+# --------------------
+OUTPUT_FILE = "design_results.txt"
+
+DESIGNS = ("factorial", "lhs", "sobol")
+DEFAULT_SAMPLES = 64        # design points of an lhs / sobol design
+
+# the populations can be varied like any SimConfig field: junk is the
+# initial junk count, cv the initial Cas9 and virus count (as in the sweep)
+POPULATION_PARAMS = ("junk", "cv")
+DEFAULT_JUNK = 100
+DEFAULT_CV = 20
+
+# design points in flight at once; a new one is submitted as each finishes,
+# so a huge design never sits in the pool's queue all at once
+BATCH_SIZE = 32
+
+RESULT_COLUMNS = ["init_junk", "init_cas9_virus", "virus_kill_density",
+                  "kill_density_sem", "ci_low", "ci_high", "n_replicates"]
+
+
+# --------------------
+# PARAMETERS
+# --------------------
+# one --vary: a range [low, high], optionally with `count` even levels for
+# a factorial design, or an explicit list of levels
+ParamSpec = namedtuple("ParamSpec", "name low high count levels")
+
+
+def parse_spec(text):
+    """NAME=LOW:HIGH, NAME=LOW:HIGH:N (N even levels) or NAME=A,B,C."""
+    name, sep, values = text.partition("=")
+    if not sep or name not in SimConfig._fields + POPULATION_PARAMS:
+        raise SystemExit(f"--vary expects NAME=..., NAME one of "
+                         f"{', '.join(SimConfig._fields + POPULATION_PARAMS)}")
+    if "," in values:
+        return ParamSpec(name, None, None, None, [float(v) for v in values.split(",")])
+    parts = values.split(":")
+    if len(parts) not in (2, 3):
+        raise SystemExit(f"--vary {text}: expected LOW:HIGH, LOW:HIGH:N or A,B,C")
+    count = int(parts[2]) if len(parts) == 3 else None
+    return ParamSpec(name, float(parts[0]), float(parts[1]), count, None)
+
+
+def spec_levels(spec):
+    """Levels of a factorial axis."""
+    if spec.levels is not None:
+        return spec.levels
+    if spec.count is None:
+        raise SystemExit(f"--design factorial needs levels for {spec.name}: "
+                         f"{spec.name}=LOW:HIGH:N or {spec.name}=A,B,C")
+    if spec.count == 1:
+        return [spec.low]
+    step = (spec.high - spec.low) / (spec.count - 1)
+    return [spec.low + k * step for k in range(spec.count)]
+
+
+def spec_value(spec, u):
+    """Map u in [0, 1) onto the spec: along the range, or onto one of the levels."""
+    if spec.levels is not None:
+        return spec.levels[min(int(u * len(spec.levels)), len(spec.levels) - 1)]
+    return spec.low + u * (spec.high - spec.low)
+
+
+# --------------------
+# DESIGNS
+# --------------------
+def latin_hypercube(n, d, seed):
+    """n points in [0, 1)^d, exactly one in each of the n slices of every axis."""
+    rng = np.random.default_rng(seed)
+    return np.stack([(rng.permutation(n) + rng.random(n)) / n for _ in range(d)], axis=1)
+
+
+def sobol_points(n, d, seed):
+    """n scrambled Sobol points in [0, 1)^d (balanced when n is a power of 2)."""
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        raise ImportError("--design sobol needs scipy installed") from None
+    return qmc.Sobol(d, scramble=True, seed=seed).random(n)
+
+
+def plan_design(specs, design, samples, seed):
+    """
+    The design points as a list of {name: value}: every combination of
+    levels for factorial, `samples` space-filling points for lhs / sobol.
+    Population counts are rounded to whole particles.
+    """
+    if design == "factorial":
+        points = [dict(zip((s.name for s in specs), combo))
+                  for combo in itertools.product(*(spec_levels(s) for s in specs))]
+    else:
+        if np is None:
+            raise ImportError(f"--design {design} needs numpy installed")
+        unit = (latin_hypercube if design == "lhs" else sobol_points)(samples, len(specs), seed)
+        points = [{s.name: spec_value(s, u) for s, u in zip(specs, row)} for row in unit]
+
+    for point in points:
+        for name in POPULATION_PARAMS:
+            if name in point:
+                point[name] = int(round(point[name]))
+    return points
+
+
+# --------------------
+# DISPATCH
+# --------------------
+def run_design_point(index, point, base, engine, seed, cache, rep_opts):
+    """
+    One design point: (index, PointStats). The replicates are seeded from
+    (seed, junk, cv, replicate) exactly like the junk x cv sweep, so all
+    points with the same populations share their random streams (common
+    random numbers): differences between them come from the parameters,
+    not from the noise.
+    """
+    overrides = dict(base)
+    overrides.update((k, v) for k, v in point.items() if k not in POPULATION_PARAMS)
+    junk = point.get("junk", DEFAULT_JUNK)
+    cv = point.get("cv", DEFAULT_CV)
+    stats = run_replicates(junk, cv, engine, seed=seed, cache=cache, config=overrides, **rep_opts)
+    return index, stats
+
+
+def iter_design(points, todo, base, engine, seed, workers=1, batch_size=BATCH_SIZE,
+                cache=None, rep_opts=None):
+    """
+    Yield (index, PointStats) for the design points listed in todo, in
+    order when serial; with workers > 1 at most batch_size points are
+    submitted at a time and results come in completion order.
+    """
+    rep_opts = rep_opts or {"replicates": 1}
+    if workers <= 1:
+        for i in todo:
+            yield run_design_point(i, points[i], base, engine, seed, cache, rep_opts)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        queue = iter(todo)
+        running = set()
+        while True:
+            for i in itertools.islice(queue, batch_size - len(running)):
+                running.add(pool.submit(run_design_point, i, points[i], base, engine, seed,
+                                        cache, rep_opts))
+            if not running:
+                break
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                yield fut.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+# --------------------
+# OUTPUT
+# --------------------
+def start_output(path, plan):
+    """New results file: keep any old one as <path>.bak, then write the header."""
+    if os.path.exists(path):
+        os.replace(path, path + ".bak")
+        print(f"Existing {path} moved to {path}.bak")
+    with open(path, "w") as f:
+        f.write("# design " + json.dumps(plan) + "\n")
+        f.write("\t".join(["index"] + plan["params"] + RESULT_COLUMNS) + "\n")
+
+
+def read_output(path):
+    """(header plan, set of finished indices); a cut-off last line doesn't count."""
+    plan = None
+    done = set()
+    with open(path) as f:
+        for line in f:
+            if line.startswith("# design "):
+                plan = json.loads(line[len("# design "):])
+            elif line.endswith("\n") and line[:1].isdigit():
+                done.add(int(line.split("\t", 1)[0]))
+    if plan is None:
+        raise ValueError(f"{path} has no '# design' header, not a design results file")
+    return plan, done
+
+
+def format_row(index, point, params, stats):
+    junk = point.get("junk", DEFAULT_JUNK)
+    cv = point.get("cv", DEFAULT_CV)
+    values = [f"{point[name]:g}" for name in params]
+    return "\t".join([str(index)] + values + [
+        str(junk), str(cv), f"{stats.mean:.6f}", f"{stats.sem:.6f}",
+        f"{stats.ci_low:.6f}", f"{stats.ci_high:.6f}", str(stats.n)]) + "\n"
+
+
+# --------------------
+# MAIN
+# --------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-parameter Cas9 design sweep (no GUI)")
+    parser.add_argument("--vary", action="append", metavar="NAME=SPEC",
+                        help="a parameter to vary: NAME=LOW:HIGH, NAME=LOW:HIGH:N or "
+                             "NAME=A,B,C; NAME is a SimConfig field, junk or cv; repeat for more")
+    parser.add_argument("--design", choices=DESIGNS, default="lhs")
+    parser.add_argument("--samples", type=positive_int, default=DEFAULT_SAMPLES,
+                        help="design points of an lhs / sobol design")
+    parser.add_argument("--set", action="append", type=config_item, metavar="NAME=VALUE",
+                        help="fix a SimConfig field for the whole design")
+    parser.add_argument("--junk", type=int, default=DEFAULT_JUNK,
+                        help="initial junk count when junk isn't varied")
+    parser.add_argument("--cv", type=int, default=DEFAULT_CV,
+                        help="initial Cas9 / virus count when cv isn't varied")
+    parser.add_argument("--engine", choices=ENGINES, default="python")
+    parser.add_argument("--replicates", type=positive_int, default=1, help="runs per design point")
+    parser.add_argument("--workers", type=positive_int, default=1,
+                        help="number of worker processes (1 = run serially)")
+    parser.add_argument("--batch-size", type=positive_int, default=BATCH_SIZE,
+                        help="design points in flight at once with --workers")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed of the design and the runs (random if not given)")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--resume", action="store_true",
+                        help="finish the design in --output, skipping the rows it already has")
+    parser.add_argument("--cache", nargs="?", const=CACHE_FILE, default=None, metavar="PATH",
+                        help=f"reuse runs from (and add new ones to) a result cache, {CACHE_FILE} "
+                             f"by default")
+    parser.add_argument("--cache-size", type=non_negative_int, default=CACHE_MAX_ENTRIES,
+                        help="runs kept in the cache, the least recently used go first")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.resume:
+        # the design comes from the file header, not the command line
+        plan, done = read_output(args.output)
+        if "model" not in plan or not same_model(plan["model"], make_config(plan["base"])):
+            raise SystemExit(f"The model constants differ from the ones {args.output} was run "
+                             f"with; start a new design instead of resuming it.")
+        trim_partial_line(args.output)
+        print(f"{args.output}: {len(done)} of {len(plan['points'])} design points already done "
+              f"(seed {plan['seed']})")
+    else:
+        if not args.vary:
+            raise SystemExit("give at least one --vary NAME=SPEC")
+        specs = [parse_spec(v) for v in args.vary]
+        seed = args.seed if args.seed is not None else secrets.randbits(63)
+        points = plan_design(specs, args.design, args.samples, seed)
+        for point in points:
+            point.setdefault("junk", args.junk)
+            point.setdefault("cv", args.cv)
+        # the populations get their own init_* columns, params are the rest
+        params = [s.name for s in specs if s.name not in POPULATION_PARAMS]
+        base = parse_overrides(args.set)
+        plan = {"design": args.design, "params": params, "seed": seed,
+                "engine": args.engine, "replicates": args.replicates, "base": base,
+                "model": model_config(make_config(base)), "points": points}
+        start_output(args.output, plan)
+        done = set()
+
+    points = plan["points"]
+    todo = [i for i in range(len(points)) if i not in done]
+    if plan["engine"] == "numba" and todo:
+        prepare_numba()
+    cache = None
+    if args.cache:
+        cache = ResultCache(args.cache, args.cache_size)
+        cached_before = len(cache)
+
+    with open(args.output, "a") as f:
+        results = iter_design(points, todo, plan["base"], plan["engine"], plan["seed"],
+                              args.workers, args.batch_size, cache,
+                              {"replicates": plan["replicates"]})
+        for n, (index, stats) in enumerate(results, 1):
+            f.write(format_row(index, points[index], plan["params"], stats))
+            f.flush()
+            point = ", ".join(f"{name}={points[index][name]:g}" for name in plan["params"] + ["junk", "cv"])
+            print(f"[{n}/{len(todo)}] #{index} {point}: kill_density={stats.mean:.3f}")
+
+    print(f"\n{len(points)} design points ({plan['design']}). Results saved to {args.output}")
+    if cache is not None:
+        report_cache(cache, cached_before)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Regression checks for the batch engines. Run with python -m pytest.
+"""
+
+import bisect
+
+import pytest
+
+import browniancas9Datamine
+from browniancas9Core import DEFAULT_CONFIG, UPDATE_INTERVAL_MS, PopulationRecorder, Simulation
+from browniancas9Datamine import (
+    ADAPTIVE_CI, ADAPTIVE_GRADIENT, EXPERIMENT_DURATION, MIN_REPLICATES, NpzWriter, ResultCache,
+    WellMixedSim, cell_corners, needs_refinement, np, parse_args, parse_overrides, python_rng,
+    run_replicates, summarize,
+)
+
+
+# --------------------
+# REPLICATES
+# --------------------
+def test_interval_stays_within_zero_and_one():
+    stats = summarize([0.0, 1.0, 1.0])
+    assert 0.0 <= stats.ci_low <= stats.mean <= stats.ci_high <= 1.0
+
+
+@pytest.mark.skipif(np is None, reason="the ssa engine needs numpy installed")
+def test_adaptive_does_not_stop_on_identical_first_runs():
+    # the first five runs of this point all miss, the true mean is ~0.35
+    stats = run_replicates(0, 1, "ssa", ci_target=0.05, seed=2)
+    assert stats.n > 5
+    assert stats.ci_low < 0.35 < stats.ci_high
+
+
+@pytest.mark.skipif(np is None, reason="the ssa engine needs numpy installed")
+def test_adaptive_stops_early_on_a_low_variance_point():
+    # 88 viruses per run: the first runs already pin the kill fraction down
+    stats = run_replicates(300, 88, "ssa", ci_target=0.05, seed=2)
+    assert stats.n == MIN_REPLICATES
+    assert stats.ci_low < stats.mean < stats.ci_high
+    assert stats.ci_high - stats.ci_low < 0.1
+
+
+def test_refinement_follows_the_interval():
+    cell = (0, 2, 0, 2)
+    # 5 runs of 88 viruses each: converged, nothing to refine
+    tight = {p: summarize([0.95, 0.94, 0.95, 0.96, 0.95], 88) for p in cell_corners(cell)}
+    assert not needs_refinement(cell, tight, ADAPTIVE_GRADIENT, ADAPTIVE_CI)
+    # the same densities from runs of one virus each are far from converged
+    wide = {p: summarize([1.0, 1.0, 1.0, 1.0, 0.0], 1) for p in cell_corners(cell)}
+    assert needs_refinement(cell, wide, ADAPTIVE_GRADIENT, ADAPTIVE_CI)
+
+
+# --------------------
+# RESULT CACHE
+# --------------------
+@pytest.mark.skipif(np is None, reason="the numpy engine needs numpy installed")
+def test_numpy_cache_without_overrides(tmp_path):
+    cache = ResultCache(str(tmp_path / "runs.sqlite"))
+    first = run_replicates(10, 10, "numpy", replicates=3, seed=1, cache=cache)
+    again = run_replicates(10, 10, "numpy", replicates=3, seed=1, cache=cache)
+    cache.close()
+    assert again == first
+    assert len(ResultCache(str(tmp_path / "runs.sqlite"))) == 3
+
+
+def test_cache_evicts_while_filling(tmp_path, monkeypatch):
+    monkeypatch.setattr(browniancas9Datamine, "CACHE_EVICT_EVERY", 10)
+    cache = ResultCache(str(tmp_path / "runs.sqlite"), max_entries=25)
+    for i in range(200):
+        cache.put(f"run{i}", 0.5)
+        assert len(cache) < 25 + 10
+    cache.close()
+
+
+# --------------------
+# OUTPUT WRITERS
+# --------------------
+@pytest.mark.skipif(np is None, reason="--format npz needs numpy installed")
+def test_npz_is_on_disk_before_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(browniancas9Datamine, "CHECKPOINT_SECONDS", 0)
+    path = str(tmp_path / "grid.npz")
+    writer = NpzWriter(path, [(0, 1), (0, 4), (10, 1), (10, 4)])
+    writer.add(10, 4, summarize([0.5, 0.25], 4))
+    grid = np.load(path)["virus_kill_density"]
+    assert grid[1, 1] == 0.375 and np.isnan(grid[0, 0])
+    writer.close()
+
+
+# --------------------
+# GILLESPIE ENGINE
+# --------------------
+class LoggedSim(WellMixedSim):
+    """WellMixedSim that notes the population after every event."""
+
+    def __init__(self, *args, **kwargs):
+        self.log = []
+        super().__init__(*args, **kwargs)
+
+    def finished(self):
+        self.log.append((self.sim_time, self.population()))
+        return super().finished()
+
+
+@pytest.mark.skipif(np is None, reason="the ssa engine needs numpy installed")
+@pytest.mark.parametrize("seed", range(5))
+def test_ssa_rows_hold_the_state_at_their_time(seed):
+    rec = PopulationRecorder(0.05, EXPERIMENT_DURATION)
+    sim = LoggedSim(100, 5, 5, python_rng(seed), recorder=rec)
+    sim.run(EXPERIMENT_DURATION)
+    times = [t for t, _ in sim.log]
+    # row 0 is the state before the first look, like Simulation's
+    for k in range(1, len(rec.times)):
+        state = sim.log[bisect.bisect_right(times, rec.times[k]) - 1][1]
+        assert tuple(rec.counts[k].tolist()) == state, rec.times[k]
+
+
+# --------------------
+# SWEPT COLLISIONS
+# --------------------
+def head_on(offset, ticks, dt=None, ccd=False):
+    """Captures after `ticks` ticks of one Cas9 passing one virus `offset` px to the side."""
+    cfg = DEFAULT_CONFIG._replace(cas9_turn_prob=0.0, dna_turn_prob=0.0, success_prob=1.0)
+    sim = Simulation(0, 1, 1, python_rng(0), dt=dt, ccd=ccd, config=cfg)
+    d, c = sim.dna_list[0], sim.cas9_list[0]
+    d.x, d.y, d.dir = 200.0, 500.0 + offset, (-1, 0)
+    c.x, c.y, c.dir = 100.0, 500.0, (1, 0)
+    if sim.grid is not None:
+        sim.grid.move(d)
+    for _ in range(ticks):
+        sim.step()
+    return sim.capture_count
+
+
+@pytest.mark.parametrize("offset", [29.0, 29.9])
+def test_swept_ticks_meet_where_base_ticks_do(offset):
+    # 26 px closer per base tick: at 29 px to the side they overlap after
+    # the 4th, at 29.9 px they only touch in between two base ticks
+    base = head_on(offset, 5)
+    assert base == (1 if offset == 29.0 else 0)
+    assert head_on(offset, 1, dt=5 * UPDATE_INTERVAL_MS / 1000.0, ccd=True) == base
+
+
+# --------------------
+# COMMAND LINE
+# --------------------
+@pytest.mark.parametrize("argv", [
+    ["--replicates", "0"], ["--coarse-step", "0"], ["--cache-size", "-1"],
+    ["--set", "success_prob=high"], ["--set", "no_such_field=1"],
+])
+def test_bad_arguments_are_usage_errors(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        parse_args(argv)
+    assert exit_info.value.code == 2
+    assert "error: argument" in capsys.readouterr().err
+
+
+def test_set_items_become_overrides():
+    args = parse_args(["--set", "success_prob=0.6", "--set", "cas9_speed=25"])
+    assert parse_overrides(args.set) == {"success_prob": 0.6, "cas9_speed": 25.0}